@@ -0,0 +1,175 @@
+from functools import wraps
+import logging
+from classes.cache import ResultCache
+from classes.payment import Payment
+from classes.project import Project
+from classes.freelancer import Freelancer
+
+# Seconds a report is served from memory before the pipeline runs again
+REPORT_TTL = 300
+# Budget ranges of the budget vs winning bid report; projects above the last bound go to "Other"
+BUDGET_BOUNDARIES = [0, 1000, 2000, 3000, 4000, 5000]
+# Ratings are integers from 1 to 5; each bucket holds one rating
+RATING_BOUNDARIES = [1, 2, 3, 4, 5, 6]
+
+# Reports are cached under (collection name, report name, database name, *arguments,
+# sorted keyword arguments), so invalidate() can drop every report computed from one
+# collection. Results are shared, not copied: callers must not modify them.
+report_cache = ResultCache(maxsize=256, ttl=REPORT_TTL)
+
+
+def cached_report(collection_name):
+    """Caches a report's result for REPORT_TTL seconds, per database and arguments."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(db, *args, **kwargs):
+            key = (collection_name, function.__name__, db.name) + args + tuple(sorted(kwargs.items()))
+            result = report_cache.get(key)
+            if result is None:
+                result = function(db, *args, **kwargs)
+                report_cache.put(key, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def _aggregate(collection, pipeline):
+    """Runs pipeline server-side, spilling large $group/$bucket stages to disk if needed."""
+    try:
+        return list(collection.aggregate(pipeline, allowDiskUse=True))
+    except Exception as e:
+        logging.error(f"Error aggregating {collection.name}: {e}")
+        raise RuntimeError(f"Failed to run report on {collection.name}: {e}")
+
+
+@cached_report(Payment.collection_name)
+def revenue_per_freelancer(db, limit: int = 20):
+    """
+    Completed payment revenue per freelancer, highest first.
+
+    Returns:
+        list: Rows with _id (the freelancerId), revenue, payments and averagePayment.
+    """
+    return _aggregate(db[Payment.collection_name], [
+        {"$match": {"paymentStatus": "Completed"}},
+        {"$group": {
+            "_id": "$freelancerId",
+            "revenue": {"$sum": "$amount"},
+            "payments": {"$sum": 1},
+            "averagePayment": {"$avg": "$amount"},
+        }},
+        {"$sort": {"revenue": -1}},
+        {"$limit": limit},
+    ])
+
+
+@cached_report(Payment.collection_name)
+def payment_status_summary(db):
+    """
+    Payment counts and amounts per paymentStatus, and the overall success rate.
+
+    Returns:
+        dict: byStatus rows (_id is the status, count, amount) and overall
+        (count, amount, successRate as the share of Completed payments).
+    """
+    result = _aggregate(db[Payment.collection_name], [
+        {"$facet": {
+            "byStatus": [
+                {"$group": {"_id": "$paymentStatus", "count": {"$sum": 1}, "amount": {"$sum": "$amount"}}},
+                {"$sort": {"count": -1}},
+            ],
+            "overall": [
+                {"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "amount": {"$sum": "$amount"},
+                    "completed": {"$sum": {"$cond": [{"$eq": ["$paymentStatus", "Completed"]}, 1, 0]}},
+                }},
+                {"$project": {
+                    "_id": 0,
+                    "count": 1,
+                    "amount": 1,
+                    "successRate": {"$divide": ["$completed", "$count"]},
+                }},
+            ],
+        }},
+    ])[0]
+    return {
+        "byStatus": result["byStatus"],
+        "overall": result["overall"][0] if result["overall"] else {"count": 0, "amount": 0, "successRate": 0.0},
+    }
+
+
+@cached_report(Project.collection_name)
+def budget_vs_winning_bid(db):
+    """
+    Compares project budgets with the bid of the freelancer who was hired.
+
+    The winning bid is the hired freelancer's lowest bid on the project; projects
+    without a hired freelancer or without a bid from them are left out.
+
+    Returns:
+        dict: overall (projects, averageBudget, averageWinningBid) and byBudget rows,
+        one per BUDGET_BOUNDARIES range, with the same fields.
+    """
+    totals = {
+        "projects": {"$sum": 1},
+        "averageBudget": {"$avg": "$budget"},
+        "averageWinningBid": {"$avg": "$winningBid"},
+    }
+    result = _aggregate(db[Project.collection_name], [
+        {"$match": {"freelancerId": {"$ne": None}, "bids.0": {"$exists": True}}},
+        {"$project": {
+            "budget": 1,
+            "winningBid": {"$min": {"$map": {
+                "input": {"$filter": {
+                    "input": "$bids",
+                    "as": "bid",
+                    "cond": {"$eq": ["$$bid.freelancerId", "$freelancerId"]},
+                }},
+                "as": "bid",
+                "in": "$$bid.bidAmount",
+            }}},
+        }},
+        {"$match": {"winningBid": {"$ne": None}}},
+        {"$facet": {
+            "overall": [{"$group": dict(_id=None, **totals)}, {"$project": {"_id": 0}}],
+            "byBudget": [{"$bucket": {
+                "groupBy": "$budget",
+                "boundaries": BUDGET_BOUNDARIES,
+                "default": "Other",
+                "output": totals,
+            }}],
+        }},
+    ])[0]
+    return {
+        "overall": result["overall"][0] if result["overall"] else None,
+        "byBudget": result["byBudget"],
+    }
+
+
+@cached_report(Freelancer.collection_name)
+def rating_distribution(db):
+    """
+    Number of freelancer reviews per rating.
+
+    Returns:
+        list: Rows with _id (the rating, or "Other" for missing or out of range ratings) and count.
+    """
+    return _aggregate(db[Freelancer.collection_name], [
+        {"$unwind": "$reviews"},
+        {"$bucket": {
+            "groupBy": "$reviews.rating",
+            "boundaries": RATING_BOUNDARIES,
+            "default": "Other",
+            "output": {"count": {"$sum": 1}},
+        }},
+    ])
+
+
+def invalidate(collection_name: str = None):
+    """Drops the cached reports computed from a collection, or every report when None."""
+    if collection_name is None:
+        report_cache.clear()
+    else:
+        report_cache.invalidate_collection(collection_name)
@@ -0,0 +1,54 @@
+"""
+Compares clean_mongo_record against documents_to_dataframe on generated Freelancer documents.
+
+Run from the repository root:
+    python -m benchmarks.dataframe_conversion [number_of_documents]
+"""
+import sys
+import time
+import bson
+import pandas as pd
+from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
+import fake_data
+from streamlit_elements import clean_mongo_record, documents_to_dataframe
+
+
+def build_raw_documents(n):
+    raw_documents = []
+    for freelancer in fake_data.generate_freelancer_data(n):
+        document = freelancer.to_dict()
+        document["_id"] = ObjectId()
+        raw_documents.append(RawBSONDocument(bson.encode(document)))
+    return raw_documents
+
+
+def recursive_path(raw_documents):
+    return pd.DataFrame([clean_mongo_record(bson.decode(document.raw)) for document in raw_documents])
+
+
+def columnar_path(raw_documents):
+    return documents_to_dataframe(raw_documents)
+
+
+def time_it(function, raw_documents, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(raw_documents)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n):
+    raw_documents = build_raw_documents(n)
+    recursive = time_it(recursive_path, raw_documents)
+    columnar = time_it(columnar_path, raw_documents)
+    print(f"{n} Freelancer documents")
+    print(f"clean_mongo_record:     {recursive * 1000:8.1f} ms ({n / recursive:,.0f} docs/s)")
+    print(f"documents_to_dataframe: {columnar * 1000:8.1f} ms ({n / columnar:,.0f} docs/s)")
+    print(f"speedup: {recursive / columnar:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,99 @@
+"""
+Measures the slotted entity representation and the generated codec.
+
+Reports the memory held per Payment against an equivalent __dict__-based class,
+to_dict/from_dict throughput with and without BSON, and the cost of loading
+Projects (through the same _from_document path as from_db, snapshot included)
+whose bids are decoded lazily versus eagerly.
+
+Run from the repository root:
+    python -m benchmarks.entity_codec [number_of_objects]
+"""
+import sys
+import time
+import tracemalloc
+import bson
+from bson import ObjectId
+from classes.payment import Payment
+from classes.project import Project
+import fake_data
+
+
+class DictPayment:
+    """Payment as it was stored before __slots__: one __dict__ per instance."""
+
+    def __init__(self, _id=None, projectId=None, clientId=None, freelancerId=None, amount=0.0,
+                 paymentStatus="Pending", timestamp=None):
+        self._id = _id
+        self.projectId = projectId
+        self.clientId = clientId
+        self.freelancerId = freelancerId
+        self.amount = amount
+        self.paymentStatus = paymentStatus
+        self.timestamp = timestamp
+        self._snapshot = None
+
+
+def bytes_per_object(factory, documents):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(**document) for document in documents]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(objects)
+
+
+def time_it(function, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label, n, seconds):
+    print(f"{label:<36}{seconds * 1000:8.1f} ms ({n / seconds:,.0f} objs/s)")
+
+
+def main(n):
+    payments = list(fake_data.generate_payment_data(n))
+    documents = [payment.to_dict() for payment in payments]
+    for document in documents:
+        document["_id"] = ObjectId()
+    raw_documents = [bson.encode(document) for document in documents]
+
+    slotted = bytes_per_object(Payment, documents)
+    with_dict = bytes_per_object(DictPayment, documents)
+    print(f"{n} Payment objects")
+    print(f"{'__slots__':<36}{slotted:8.0f} bytes/object")
+    print(f"{'__dict__':<36}{with_dict:8.0f} bytes/object ({1 - slotted / with_dict:.0%} saved)")
+
+    report("to_dict", n, time_it(lambda: [payment.to_dict() for payment in payments]))
+    report("from_dict", n, time_it(lambda: [Payment.from_dict(document) for document in documents]))
+    report("to_dict + bson.encode", n, time_it(lambda: [bson.encode(payment.to_dict()) for payment in payments]))
+    report("bson.decode + from_dict", n, time_it(lambda: [Payment.from_dict(bson.decode(raw)) for raw in raw_documents]))
+
+    bids_per_project = 20
+    projects = []
+    for project in fake_data.iter_project_data(n):
+        project.bids = fake_data.generate_bid_data(bids_per_project)
+        document = project.to_dict()
+        document["_id"] = ObjectId()
+        projects.append(document)
+
+    # No session identity map is active, so _from_document never touches the collection
+    def lazy():
+        return [Project._from_document(None, document) for document in projects]
+
+    def eager():
+        for document in projects:
+            Project._from_document(None, document).bids
+
+    print(f"{n} Project documents with {bids_per_project} bids each")
+    report("load (bids left undecoded)", n, time_it(lazy))
+    report("load + bids access", n, time_it(eager))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
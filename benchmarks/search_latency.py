@@ -0,0 +1,89 @@
+"""
+Measures search_freelancers and search_projects latency on a large seeded database.
+
+Freelancers and Projects are seeded into a separate database (only up to the
+requested count, so reruns reuse earlier seeding), the search indexes are synced,
+and each query shape is timed over several runs, against a $regex collection scan
+as a baseline.
+
+Run from the repository root:
+    python -m benchmarks.search_latency [number_of_documents]
+"""
+import random
+import statistics
+import sys
+import time
+import connection
+import fake_data
+import indexes
+import search
+from classes.freelancer import Freelancer
+from classes.project import Project
+
+DATABASE_NAME = f"{connection.DATABASE_NAME}SearchBench"
+
+
+def seed(db, n):
+    for entity_class, generate in [(Freelancer, fake_data.iter_freelancer_data), (Project, fake_data.iter_project_data)]:
+        collection = db[entity_class.collection_name]
+        missing = n - collection.estimated_document_count()
+        if missing > 0:
+            start = time.perf_counter()
+            fake_data.insert_stream(collection, generate(missing), batch_size=5000)
+            print(f"Seeded {missing} {entity_class.collection_name} in {time.perf_counter() - start:.0f}s")
+    indexes.sync_indexes(db, [Freelancer, Project], explain=False)
+
+
+def latencies(function, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<40}p50 {statistics.median(timings):8.1f} ms   p95 {p95:8.1f} ms")
+
+
+def main(n, runs=20):
+    db = connection.get_database(DATABASE_NAME)
+    seed(db, n)
+
+    # Query terms drawn from the seeded data, so every search has hits
+    sample = db[Freelancer.collection_name].aggregate([{"$sample": {"size": runs}}, {"$project": {"skills": 1}}])
+    skill_sets = [freelancer["skills"][:2] for freelancer in sample]
+    titles = [project["title"] for project in db[Project.collection_name].aggregate([{"$sample": {"size": runs}}])]
+    words = [random.choice(title.split()) for title in titles]
+
+    print(f"{n} Freelancers and Projects, {runs} runs per query")
+    report("search_freelancers(skills)", latencies(
+        lambda: search.search_freelancers(db, skills=random.choice(skill_sets)), runs))
+    report("search_freelancers(skills, min_rating)", latencies(
+        lambda: search.search_freelancers(db, skills=random.choice(skill_sets), min_rating=4.0), runs))
+    report("search_freelancers(query)", latencies(
+        lambda: search.search_freelancers(db, query=" ".join(random.choice(skill_sets))), runs))
+    report("search_projects(query)", latencies(
+        lambda: search.search_projects(db, random.choice(words)), runs))
+    report("search_projects(query, budget_range)", latencies(
+        lambda: search.search_projects(db, random.choice(words), (1000, 2000)), runs))
+
+    def second_page():
+        word = random.choice(words)
+        _, cursor = search.search_projects(db, word)
+        if cursor is not None:
+            search.search_projects(db, word, after=cursor)
+
+    report("search_projects first + second page", latencies(second_page, runs))
+
+    projects = db[Project.collection_name]
+    report("baseline: first 20 $regex title matches", latencies(
+        lambda: list(projects.find({"title": {"$regex": random.choice(words), "$options": "i"}}).limit(20)),
+        max(1, runs // 4)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
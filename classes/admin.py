@@ -1,10 +1,29 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel
 from bson import ObjectId
 from datetime import datetime
 from typing import Optional
 import logging
+from classes.base import BaseEntity
+from classes.codec import Field
+
+class Admin(BaseEntity):
+    __slots__ = ("_id", "user", "role", "createdAt", "updatedAt")
+    fields = [
+        Field("user"),
+        Field("role"),
+        Field("createdAt"),
+        Field("updatedAt"),
+    ]
+    collection_name = "Admins"
+    indexes = [
+        IndexModel([("user", 1)]),
+    ]
+    query_shapes = {
+        "_id (from_db)": {"_id": ObjectId()},
+        "user": {"user": ObjectId()},
+    }
+    touch_field = "updatedAt"
 
-class Admin:
     def __init__(
         self,
         _id: Optional[ObjectId] = None,
@@ -21,20 +40,19 @@ class Admin:
 
     def save_to_db(self, db):
         """Save the Admin document to MongoDB."""
-        admin_data = {
-            "user": self.user,
-            "role": self.role,
-            "createdAt": self.createdAt,
-            "updatedAt": self.updatedAt,
-        }
+        admin_data = self.to_dict()
         try:
             if self._id:
-                db.update_one({"_id": self._id}, {"$set": admin_data})
-                logging.info(f"Admin with ID {self._id} updated successfully.")
+                changes = self._changes(admin_data)
+                if changes:
+                    db.update_one({"_id": self._id}, changes)
+                    logging.info(f"Admin with ID {self._id} updated successfully.")
             else:
                 result = db.insert_one(admin_data)
                 self._id = result.inserted_id
                 logging.info(f"Admin inserted with ID {self._id}.")
+            self._mark_clean(admin_data)
+            self._invalidate(db)
         except Exception as e:
             logging.error(f"Error saving admin: {e}")
             raise RuntimeError(f"Failed to save admin: {e}")
@@ -43,16 +61,10 @@ class Admin:
     def from_db(cls, db, _id: ObjectId):
         """Retrieve an Admin document from MongoDB and create an instance."""
         try:
-            data = db.find_one({"_id": _id})
-            if data:
-                logging.info(f"Admin with ID {data['_id']} found.")
-                return cls(
-                    _id=data["_id"],
-                    user=data.get("user"),
-                    role=data.get("role"),
-                    createdAt=data.get("createdAt"),
-                    updatedAt=data.get("updatedAt"),
-                )
+            instance = cls._load(db, _id)
+            if instance:
+                logging.info(f"Admin with ID {instance._id} found.")
+                return instance
             logging.warning(f"No admin found with ID {_id}.")
             return None
         except Exception as e:
@@ -77,6 +89,7 @@ class Admin:
         try:
             if self._id:
                 db.delete_one({"_id": self._id})
+                self._invalidate(db, deleted=True)
                 self._id = None
                 logging.info(f"Admin with ID {self._id} deleted successfully.")
             else:
@@ -0,0 +1,503 @@
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne, ReplaceOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from typing import Iterable, Iterator, List, Optional
+from collections import namedtuple
+from functools import lru_cache
+from datetime import datetime
+import copy
+import logging
+import time
+from classes.cache import entity_cache, current_identity_map
+from classes.codec import build_codec
+
+_MISSING = object()
+
+# Seconds between refreshSessions commands during a no_cursor_timeout scan; the server
+# expires a session left idle for 30 minutes, killing its cursors with it
+SESSION_REFRESH_INTERVAL = 5 * 60
+
+
+@lru_cache(maxsize=None)
+def _row_type(entity_class, fields: tuple):
+    """The namedtuple yielded by iter_all for fields, created once per class and field list."""
+    return namedtuple(f"{entity_class.__name__}Row", ("id",) + fields)
+
+
+class BaseEntity:
+    """
+    Behaviour shared by every entity class stored in its own collection.
+
+    Subclasses declare __slots__ for their attributes and a fields list of
+    codec.Field; to_dict and from_dict are generated from fields when the
+    subclass is created.
+    """
+
+    # Deep copy of to_dict() as last loaded or saved; None until the object is persisted
+    __slots__ = ("_snapshot",)
+
+    # codec.Field declarations mapping attributes to document keys
+    fields: list = []
+    # Collection the entity is stored in
+    collection_name: str = None
+    # IndexModels the entity's queries rely on; created by indexes.sync_indexes
+    indexes: list = []
+    # Query shape -> sample filter, explained by indexes.sync_indexes to verify index use.
+    # The methods issuing a shape are named in parentheses; shapes without them are the
+    # filters the declared indexes serve for ad-hoc queries (viewer filters, analytics, scripts).
+    query_shapes: dict = {}
+    # Attribute holding the last-modified timestamp, bumped by update(); None if there is none
+    touch_field: str = None
+    # Whether saving a modified entity also bumps touch_field (User.save_to_db does)
+    touch_on_save: bool = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "fields" in cls.__dict__:
+            to_dict, from_dict = build_codec(cls, cls.fields)
+            to_dict.__doc__ = "Converts the object to a dictionary for MongoDB storage."
+            from_dict.__doc__ = f"Creates a {cls.__name__} instance from a MongoDB document."
+            cls.to_dict = to_dict
+            cls.from_dict = classmethod(from_dict)
+
+    def __new__(cls, *args, **kwargs):
+        instance = super().__new__(cls)
+        instance._snapshot = None
+        return instance
+
+    def _validate(self):
+        """Raises ValueError if the entity cannot be saved; called before every save."""
+
+    def _mark_clean(self, document: dict = None, fields: Iterable[str] = None):
+        """
+        Records the current state as persisted, so later saves only send what changed.
+
+        With fields, only those fields are recorded, e.g. after an atomic update that
+        wrote them directly; other pending modifications stay dirty.
+        """
+        document = document if document is not None else self.to_dict()
+        if fields is None:
+            self._snapshot = copy.deepcopy(document)
+        elif self._snapshot is not None:
+            for field in fields:
+                self._snapshot[field] = copy.deepcopy(document[field])
+
+    def dirty_fields(self) -> list:
+        """Returns the document fields modified since the object was loaded or last saved."""
+        document = self.to_dict()
+        if self._snapshot is None:
+            return list(document)
+        return [field for field, value in document.items() if self._snapshot.get(field, _MISSING) != value]
+
+    def _changes(self, document: dict = None) -> dict:
+        """
+        Builds the minimal update for the fields modified since the last load or save.
+
+        Lists that only grew at the end are sent as $push with $each of the new items,
+        every other modified field as $set. Objects that were never loaded or saved
+        send their whole document. An empty dict means there is nothing to write.
+        """
+        document = document if document is not None else self.to_dict()
+        if self._snapshot is None:
+            return {"$set": document}
+
+        set_fields, push_fields = {}, {}
+        for field, value in document.items():
+            old = self._snapshot.get(field, _MISSING)
+            if value == old:
+                continue
+            if isinstance(value, list) and isinstance(old, list) and len(value) > len(old) and value[:len(old)] == old:
+                push_fields[field] = {"$each": value[len(old):]}
+            else:
+                set_fields[field] = value
+
+        changes = {}
+        if set_fields:
+            changes["$set"] = set_fields
+        if push_fields:
+            changes["$push"] = push_fields
+        return changes
+
+    @classmethod
+    def _load_cached(cls, db, _id):
+        """Returns the entity from the session's identity map or the entity cache, or None."""
+        key = (db.full_name, _id)
+        identity_map = current_identity_map()
+        if identity_map is not None:
+            instance = identity_map.get(key)
+            if instance is not None:
+                return instance
+        data = entity_cache.get(key)
+        return cls._from_document(db, data) if data is not None else None
+
+    @classmethod
+    def _load(cls, db, _id):
+        """
+        Loads one entity by _id, through the session's identity map and the entity cache.
+
+        Returns:
+            The instance, or None if no document has this _id.
+        """
+        instance = cls._load_cached(db, _id)
+        if instance is not None:
+            return instance
+        data = db.find_one({"_id": _id})
+        if data is None:
+            return None
+        entity_cache.put((db.full_name, _id), data)
+        return cls._from_document(db, data)
+
+    @classmethod
+    def _from_document(cls, db, data: dict):
+        """
+        Builds a clean instance from a loaded document, or returns the one already in the identity map.
+
+        The snapshot is taken from the document itself rather than to_dict(), so
+        loading does not encode every field back (nor decode lazily held ones, such
+        as Project.bids), and fields the document lacks are saved on the next write.
+        """
+        instance = cls.from_dict(data)
+        instance._mark_clean(data)
+        identity_map = current_identity_map()
+        if identity_map is not None:
+            instance = identity_map.add((db.full_name, instance._id), instance)
+        return instance
+
+    @classmethod
+    def from_db_many(cls, db, ids: Iterable[ObjectId], chunk_size: int = 1000) -> List[Optional["BaseEntity"]]:
+        """
+        Loads many entities with one $in query per chunk_size ids instead of one find_one each.
+
+        Ids already in the session's identity map or the entity cache are not queried.
+
+        Parameters:
+            db (Collection): The MongoDB collection.
+            ids (Iterable): The ids to load; duplicates are fetched once.
+            chunk_size (int): Maximum number of ids per $in query.
+
+        Returns:
+            list: The instances in the order of ids, with None for ids that were not found.
+        """
+        ids = list(ids)
+        found = {}
+        pending = []
+        for _id in dict.fromkeys(ids):
+            instance = cls._load_cached(db, _id)
+            if instance is None:
+                pending.append(_id)
+            else:
+                found[_id] = instance
+
+        try:
+            for start in range(0, len(pending), chunk_size):
+                for data in db.find({"_id": {"$in": pending[start:start + chunk_size]}}):
+                    entity_cache.put((db.full_name, data["_id"]), data)
+                    found[data["_id"]] = cls._from_document(db, data)
+        except PyMongoError as e:
+            logging.error(f"Failed to fetch {len(pending)} {cls.__name__} documents: {e}")
+            raise RuntimeError(f"Failed to fetch {cls.__name__} documents: {e}")
+
+        return [found.get(_id) for _id in ids]
+
+    @classmethod
+    def _stream_query(cls, fields: Optional[Iterable[str]]):
+        """Returns the projection and the row builder of iter_all for fields."""
+        if fields is None:
+            return None, cls.from_dict
+        keys = {field.attribute: field.key for field in cls.fields}
+        fields = tuple(field for field in fields if field != "_id")
+        unknown = [field for field in fields if field not in keys]
+        if unknown:
+            raise ValueError(f"{cls.__name__} has no fields {unknown}.")
+
+        row_type = _row_type(cls, fields)
+        document_keys = [keys[field] for field in fields]
+
+        def build(document):
+            get = document.get
+            return row_type(get("_id"), *[get(key) for key in document_keys])
+
+        return dict.fromkeys(document_keys, 1), build
+
+    @classmethod
+    def iter_all(
+        cls,
+        db,
+        filter: dict = None,
+        fields: Optional[Iterable[str]] = None,
+        batch_size: int = 1000,
+        sort: Optional[list] = None,
+        no_cursor_timeout: bool = False,
+    ) -> Iterator:
+        """
+        Streams the matching documents lazily, fetching batch_size documents per round trip.
+
+        Memory use stays constant whatever the number of matches. Without fields each
+        document is built into an entity; these skip the identity map and the entity
+        cache and are not change-tracked, so saving one sends all of its fields. With
+        fields only those are fetched, and each row is a namedtuple of id and the
+        fields' stored values, e.g. Payment.iter_all(db, fields=["paymentStatus"])
+        yields PaymentRow(id=..., paymentStatus=...).
+
+        For long batch jobs pass no_cursor_timeout: the server then keeps the cursor
+        open however slowly it is consumed, and the scan runs in an explicit session
+        refreshed every SESSION_REFRESH_INTERVAL seconds so that it does not expire
+        either. The cursor is closed when the generator is exhausted or closed.
+
+        Parameters:
+            db (Collection): The MongoDB collection.
+            filter (dict): The query; every document when omitted.
+            fields (list): Attribute names to fetch; whole entities when omitted.
+            batch_size (int): Number of documents per batch.
+            sort (list): (key, direction) pairs, as for Cursor.sort.
+            no_cursor_timeout (bool): Whether the scan may outlive the server's idle cursor timeout.
+        """
+        projection, build = cls._stream_query(fields)
+        client = db.database.client
+        session = client.start_session() if no_cursor_timeout else None
+        cursor = db.find(filter or {}, projection, batch_size=batch_size,
+                         no_cursor_timeout=no_cursor_timeout, session=session)
+        if sort:
+            cursor = cursor.sort(sort)
+        refreshed = time.monotonic()
+        try:
+            for document in cursor:
+                yield build(document)
+                if session is not None and time.monotonic() - refreshed > SESSION_REFRESH_INTERVAL:
+                    client.admin.command("refreshSessions", [session.session_id], session=session)
+                    refreshed = time.monotonic()
+        except PyMongoError as e:
+            logging.error(f"Error streaming {cls.__name__} documents: {e}")
+            raise RuntimeError(f"Failed to stream {cls.__name__} documents: {e}")
+        finally:
+            cursor.close()
+            if session is not None:
+                session.end_session()
+
+    def _invalidate(self, db, deleted: bool = False):
+        """Drops this entity from the entity cache after a write, and from the identity map if deleted."""
+        key = (db.full_name, self._id)
+        entity_cache.invalidate(key)
+        identity_map = current_identity_map()
+        if deleted and identity_map is not None:
+            identity_map.discard(key)
+
+    @classmethod
+    def save_many(cls, collection, objs: Iterable["BaseEntity"], batch_size: int = 1000, replace: bool = False) -> dict:
+        """
+        Saves many objects with one bulk_write per batch instead of one round trip per object.
+
+        Objects without an _id are inserted and receive their new _id once the batch
+        has been written. Objects with an _id are upserted, either with a $set of
+        their fields (UpdateOne) or, when replace is True, as a whole document (ReplaceOne).
+        Loaded objects only send their changed fields, and unchanged ones are skipped.
+
+        Parameters:
+            collection (Collection): The MongoDB collection.
+            objs (Iterable): The objects to save.
+            batch_size (int): Maximum number of operations per bulk_write call.
+            replace (bool): Use ReplaceOne instead of UpdateOne for existing objects.
+
+        Returns:
+            dict: Counts of inserted, matched, modified and upserted documents.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+
+        totals = {"inserted": 0, "matched": 0, "modified": 0, "upserted": 0}
+        batch = []
+        for obj in objs:
+            batch.append(obj)
+            if len(batch) == batch_size:
+                cls._write_batch(collection, batch, replace, totals)
+                batch = []
+        if batch:
+            cls._write_batch(collection, batch, replace, totals)
+
+        logging.info(f"{cls.__name__}.save_many wrote {totals} to {collection.name}.")
+        return totals
+
+    @classmethod
+    def _before_batch_write(cls, collection, batch: list):
+        """Called before a save_many batch is written; its result is passed to _after_batch_write."""
+        return None
+
+    @classmethod
+    def _after_batch_write(cls, collection, written: list, context):
+        """Called with the (object, document) pairs of a save_many batch that were written."""
+
+    @classmethod
+    def _write_batch(cls, collection, batch: list, replace: bool, totals: dict):
+        context = cls._before_batch_write(collection, batch)
+        requests = []
+        written = []
+        new_ids = {}
+        for obj in batch:
+            obj._validate()
+            document = obj.to_dict()
+            if obj._id is None:
+                document["_id"] = new_ids[len(requests)] = ObjectId()
+                requests.append(InsertOne(document))
+            elif replace:
+                requests.append(ReplaceOne({"_id": obj._id}, document, upsert=True))
+            else:
+                changes = obj._changes(document)
+                if not changes:
+                    continue
+                requests.append(UpdateOne({"_id": obj._id}, changes, upsert=obj._snapshot is None))
+            written.append((obj, document))
+
+        if not requests:
+            return
+        try:
+            result = collection.bulk_write(requests, ordered=False)
+            counts = result.bulk_api_result
+            failed = set()
+        except BulkWriteError as e:
+            counts = e.details
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+        except PyMongoError as e:
+            logging.error(f"Failed to save {cls.__name__} batch: {e}")
+            raise RuntimeError(f"Failed to save {cls.__name__} batch: {e}")
+
+        succeeded = []
+        for index, (obj, document) in enumerate(written):
+            if index in failed:
+                continue
+            if index in new_ids:
+                obj._id = new_ids[index]
+            obj._mark_clean(document)
+            obj._invalidate(collection)
+            succeeded.append((obj, document))
+        cls._after_batch_write(collection, succeeded, context)
+
+        totals["inserted"] += counts.get("nInserted", 0)
+        totals["matched"] += counts.get("nMatched", 0)
+        totals["modified"] += counts.get("nModified", 0)
+        totals["upserted"] += counts.get("nUpserted", 0)
+
+        if failed:
+            logging.error(f"{len(failed)} {cls.__name__} documents rejected by {collection.name}.")
+            raise RuntimeError(f"Failed to save {len(failed)} {cls.__name__} documents.")
+
+    # asyncio counterparts of the persistence methods. db is a Motor collection
+    # (see connection.get_async_database); the document mapping, change tracking and
+    # caching are shared with the synchronous methods, so independent lookups can
+    # run together, e.g. await asyncio.gather(Project.async_from_db(...), Payment.async_from_db(...)).
+
+    @classmethod
+    async def async_from_db(cls, db, _id: ObjectId):
+        """Loads one entity by _id without blocking the event loop; None if not found."""
+        instance = cls._load_cached(db, _id)
+        if instance is not None:
+            return instance
+        try:
+            data = await db.find_one({"_id": _id})
+        except PyMongoError as e:
+            logging.error(f"Failed to fetch {cls.__name__} with ID {_id}: {e}")
+            raise RuntimeError(f"Failed to fetch {cls.__name__}: {e}")
+        if data is None:
+            return None
+        entity_cache.put((db.full_name, _id), data)
+        return cls._from_document(db, data)
+
+    @classmethod
+    async def async_from_db_many(cls, db, ids: Iterable[ObjectId], chunk_size: int = 1000) -> List[Optional["BaseEntity"]]:
+        """Async counterpart of from_db_many: one $in query per chunk, results in input order."""
+        ids = list(ids)
+        found = {}
+        pending = []
+        for _id in dict.fromkeys(ids):
+            instance = cls._load_cached(db, _id)
+            if instance is None:
+                pending.append(_id)
+            else:
+                found[_id] = instance
+
+        try:
+            for start in range(0, len(pending), chunk_size):
+                async for data in db.find({"_id": {"$in": pending[start:start + chunk_size]}}):
+                    entity_cache.put((db.full_name, data["_id"]), data)
+                    found[data["_id"]] = cls._from_document(db, data)
+        except PyMongoError as e:
+            logging.error(f"Failed to fetch {len(pending)} {cls.__name__} documents: {e}")
+            raise RuntimeError(f"Failed to fetch {cls.__name__} documents: {e}")
+
+        return [found.get(_id) for _id in ids]
+
+    @classmethod
+    async def async_iter_all(
+        cls,
+        db,
+        filter: dict = None,
+        fields: Optional[Iterable[str]] = None,
+        batch_size: int = 1000,
+        sort: Optional[list] = None,
+        no_cursor_timeout: bool = False,
+    ):
+        """Async counterpart of iter_all, used as: async for row in cls.async_iter_all(...)."""
+        projection, build = cls._stream_query(fields)
+        client = db.database.client
+        session = await client.start_session() if no_cursor_timeout else None
+        cursor = db.find(filter or {}, projection, batch_size=batch_size,
+                         no_cursor_timeout=no_cursor_timeout, session=session)
+        if sort:
+            cursor = cursor.sort(sort)
+        refreshed = time.monotonic()
+        try:
+            async for document in cursor:
+                yield build(document)
+                if session is not None and time.monotonic() - refreshed > SESSION_REFRESH_INTERVAL:
+                    await client.admin.command("refreshSessions", [session.session_id], session=session)
+                    refreshed = time.monotonic()
+        except PyMongoError as e:
+            logging.error(f"Error streaming {cls.__name__} documents: {e}")
+            raise RuntimeError(f"Failed to stream {cls.__name__} documents: {e}")
+        finally:
+            await cursor.close()
+            if session is not None:
+                await session.end_session()
+
+    async def async_save(self, db) -> ObjectId:
+        """Inserts the entity, or sends only its changed fields; returns its _id."""
+        self._validate()
+        document = self.to_dict()
+        try:
+            if self._id is None:
+                result = await db.insert_one(document)
+                self._id = result.inserted_id
+            else:
+                if self.touch_on_save and self._changes(document):
+                    setattr(self, self.touch_field, datetime.utcnow())
+                    document = self.to_dict()
+                changes = self._changes(document)
+                if changes:
+                    await db.update_one({"_id": self._id}, changes, upsert=self._snapshot is None)
+        except PyMongoError as e:
+            logging.error(f"Error saving {type(self).__name__}: {e}")
+            raise RuntimeError(f"Failed to save {type(self).__name__}: {e}")
+        self._mark_clean(document)
+        self._invalidate(db)
+        return self._id
+
+    async def async_update(self, db, **kwargs) -> ObjectId:
+        """Sets the given attributes, bumps touch_field and saves the changes."""
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+        if self.touch_field:
+            setattr(self, self.touch_field, datetime.utcnow())
+        return await self.async_save(db)
+
+    async def async_delete(self, db) -> bool:
+        """Deletes the entity; returns True if a document was removed."""
+        if not self._id:
+            return False
+        try:
+            result = await db.delete_one({"_id": self._id})
+        except PyMongoError as e:
+            logging.error(f"Error deleting {type(self).__name__} with ID {self._id}: {e}")
+            raise RuntimeError(f"Failed to delete {type(self).__name__}: {e}")
+        self._invalidate(db, deleted=True)
+        self._id = None
+        return result.deleted_count > 0
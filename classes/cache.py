@@ -0,0 +1,174 @@
+from collections import OrderedDict
+from contextvars import ContextVar
+import threading
+import time
+import bson
+
+
+class EntityCache:
+    """
+    Process-wide read-through LRU cache of documents keyed by (collection, _id).
+
+    Documents are stored BSON-encoded and decoded on every hit, so each caller gets
+    its own copy and mutating a loaded entity never alters the cache. Entries expire
+    after ttl seconds. The cache is disabled (maxsize 0) until configured.
+    """
+
+    _encode = staticmethod(bson.encode)
+    _decode = staticmethod(bson.decode)
+
+    def __init__(self, maxsize: int = 0, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def configure(self, maxsize: int, ttl: float):
+        """Resizes the cache and changes its TTL, dropping every cached document."""
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._entries.clear()
+
+    def get(self, key):
+        """Returns a fresh copy of the cached document, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, raw = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        return self._decode(raw)
+
+    def put(self, key, document: dict):
+        if not self.enabled:
+            return
+        raw = self._encode(document)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, raw)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def invalidate_collection(self, collection_name: str):
+        """Drops every cached document of a collection, e.g. after an update_many."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == collection_name]:
+                del self._entries[key]
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+class ResultCache(EntityCache):
+    """
+    LRU cache with TTL for query results of any type, such as viewer DataFrames.
+
+    Results are stored and returned as-is, without a copy, so callers must not
+    modify them. Keys start with the collection's full name, like EntityCache keys.
+    """
+
+    _encode = staticmethod(lambda result: result)
+    _decode = staticmethod(lambda result: result)
+
+
+class IdentityMap:
+    """
+    Per-session map guaranteeing one instance per (collection, _id).
+
+    Used as a context manager: while it is active, loading the same document
+    twice returns the instance loaded first, without another round trip.
+    """
+
+    def __init__(self):
+        self._instances = {}
+        self._token = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        instance = self._instances.get(key)
+        if instance is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return instance
+
+    def add(self, key, instance):
+        """Maps instance unless the key is already mapped; returns the mapped instance."""
+        return self._instances.setdefault(key, instance)
+
+    def discard(self, key):
+        self._instances.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._instances),
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __enter__(self):
+        self._token = _current_identity_map.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current_identity_map.reset(self._token)
+
+
+_current_identity_map = ContextVar("identity_map", default=None)
+
+entity_cache = EntityCache()
+# Results of the Streamlit viewer's queries; cleared by the modules that rewrite whole collections
+query_cache = ResultCache(maxsize=256, ttl=60.0)
+
+
+def current_identity_map():
+    """Returns the identity map of the current session, or None outside of one."""
+    return _current_identity_map.get()
+
+
+def enable_cache(maxsize: int = 10000, ttl: float = 60.0):
+    """Turns on the process-wide entity cache used by from_db and find_by_id."""
+    entity_cache.configure(maxsize, ttl)
+
+
+def cache_stats() -> dict:
+    """Returns hit-ratio statistics of the entity cache and of the active identity map."""
+    identity_map = current_identity_map()
+    return {
+        "cache": entity_cache.stats(),
+        "identity_map": identity_map.stats() if identity_map is not None else None,
+    }
@@ -1,9 +1,27 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel
 from bson import ObjectId
 from datetime import datetime
 from typing import Optional
+from classes.base import BaseEntity
+from classes.codec import Field
+
+class Category(BaseEntity):
+    __slots__ = ("_id", "name", "createdAt", "updatedAt")
+    fields = [
+        Field("name"),
+        Field("createdAt"),
+        Field("updatedAt"),
+    ]
+    collection_name = "Categories"
+    indexes = [
+        IndexModel([("name", 1)]),
+    ]
+    query_shapes = {
+        "_id (from_db)": {"_id": ObjectId()},
+        "name": {"name": ""},
+    }
+    touch_field = "updatedAt"
 
-class Category:
     def __init__(
         self,
         _id: Optional[ObjectId] = None,
@@ -16,34 +34,29 @@ class Category:
         self.createdAt = createdAt or datetime.utcnow()
         self.updatedAt = updatedAt or datetime.utcnow()
 
-    def save_to_db(self, db):
-        """Save the Category document to MongoDB."""
+    def _validate(self):
         if not self.name:
             raise ValueError("Category name cannot be empty.")
-        
-        category_data = {
-            "name": self.name,
-            "createdAt": self.createdAt,
-            "updatedAt": self.updatedAt
-        }
+
+    def save_to_db(self, db):
+        """Save the Category document to MongoDB."""
+        self._validate()
+
+        category_data = self.to_dict()
         if self._id:
-            db.update_one({"_id": self._id}, {"$set": category_data})
+            changes = self._changes(category_data)
+            if changes:
+                db.update_one({"_id": self._id}, changes)
         else:
             result = db.insert_one(category_data)
             self._id = result.inserted_id
+        self._mark_clean(category_data)
+        self._invalidate(db)
 
     @classmethod
     def from_db(cls, db, _id: ObjectId):
         """Retrieve a Category document from MongoDB and create an instance."""
-        data = db.find_one({"_id": _id})
-        if data:
-            return cls(
-                _id=data["_id"],
-                name=data["name"],
-                createdAt=data["createdAt"],
-                updatedAt=data["updatedAt"]
-            )
-        return None
+        return cls._load(db, _id)
 
     def update(self, db, name: str):
         """Update the category details."""
@@ -58,4 +71,5 @@ class Category:
         """Delete the Category document from MongoDB."""
         if self._id:
             db.delete_one({"_id": self._id})
+            self._invalidate(db, deleted=True)
             self._id = None
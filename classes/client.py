@@ -1,10 +1,41 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel
 from bson import ObjectId
 from datetime import datetime
 from typing import List, Dict, Optional
 import logging
+from classes.base import BaseEntity
+from classes.codec import Field
+
+class Client(BaseEntity):
+    __slots__ = (
+        "_id",
+        "user",
+        "email",
+        "hiredFreelancers",
+        "reviewsGiven",
+        "createdAt",
+        "updatedAt",
+    )
+    fields = [
+        Field("user"),
+        Field("email"),
+        Field("hiredFreelancers"),
+        Field("reviewsGiven"),
+        Field("createdAt"),
+        Field("updatedAt"),
+    ]
+    collection_name = "Clients"
+    indexes = [
+        IndexModel([("email", 1)], unique=True),
+        IndexModel([("user", 1)]),
+    ]
+    query_shapes = {
+        "_id (from_db)": {"_id": ObjectId()},
+        "email": {"email": ""},
+        "user": {"user": ObjectId()},
+    }
+    touch_field = "updatedAt"
 
-class Client:
     def __init__(
         self,
         _id: Optional[ObjectId] = None,
@@ -24,22 +55,19 @@ class Client:
         self.updatedAt = updatedAt or datetime.utcnow()
 
     def save_to_db(self, db):
-        client_data = {
-            "user": self.user,
-            "email": self.email,
-            "hiredFreelancers": self.hiredFreelancers,
-            "reviewsGiven": self.reviewsGiven,
-            "createdAt": self.createdAt,
-            "updatedAt": self.updatedAt,
-        }
+        client_data = self.to_dict()
         try:
             if self._id:
-                db.update_one({"_id": self._id}, {"$set": client_data})
-                logging.info(f"Client with ID {self._id} updated successfully.")
+                changes = self._changes(client_data)
+                if changes:
+                    db.update_one({"_id": self._id}, changes)
+                    logging.info(f"Client with ID {self._id} updated successfully.")
             else:
                 result = db.insert_one(client_data)
                 self._id = result.inserted_id
                 logging.info(f"Client inserted with ID {self._id}.")
+            self._mark_clean(client_data)
+            self._invalidate(db)
         except Exception as e:
             logging.error(f"Error saving client: {e}")
             raise RuntimeError(f"Failed to save client: {e}")
@@ -47,18 +75,10 @@ class Client:
     @classmethod
     def from_db(cls, db, _id: ObjectId):
         try:
-            data = db.find_one({"_id": _id})
-            if data:
-                logging.info(f"Client with ID {data['_id']} found.")
-                return cls(
-                    _id=data["_id"],
-                    user=data.get("user"),
-                    email=data.get("email"),
-                    hiredFreelancers=data.get("hiredFreelancers", []),
-                    reviewsGiven=data.get("reviewsGiven", []),
-                    createdAt=data.get("createdAt"),
-                    updatedAt=data.get("updatedAt"),
-                )
+            instance = cls._load(db, _id)
+            if instance:
+                logging.info(f"Client with ID {instance._id} found.")
+                return instance
             logging.warning(f"No client found with ID {_id}.")
             return None
         except Exception as e:
@@ -81,6 +101,7 @@ class Client:
         try:
             if self._id:
                 db.delete_one({"_id": self._id})
+                self._invalidate(db, deleted=True)
                 self._id = None
                 logging.info(f"Client with ID {self._id} deleted successfully.")
             else:
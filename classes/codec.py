@@ -0,0 +1,93 @@
+from typing import Callable, Optional
+
+
+class Field:
+    """Maps an entity attribute to a document key, with optional conversion hooks."""
+
+    __slots__ = ("attribute", "key", "encode", "decode", "source")
+
+    def __init__(
+        self,
+        attribute: str,
+        key: Optional[str] = None,
+        encode: Optional[Callable] = None,
+        decode: Optional[Callable] = None,
+        source: Optional[str] = None,
+    ):
+        """
+        Parameters:
+            attribute (str): The attribute, which must also be a constructor argument.
+            key (str): The document key; defaults to the attribute name.
+            encode (callable): Converts the attribute value for storage.
+            decode (callable): Converts the stored value (or None when missing) for the constructor.
+            source (str): The attribute to_dict reads instead, e.g. the slot behind a lazily decoding property.
+        """
+        self.attribute = attribute
+        self.key = key or attribute
+        self.encode = encode
+        self.decode = decode
+        self.source = source or attribute
+
+
+def build_codec(cls, fields):
+    """
+    Generates to_dict and from_dict functions for cls from its field declarations.
+
+    The functions are compiled from source once per class, so converting an object
+    costs one dict literal (to_dict) or one constructor call (from_dict) with no
+    per-field loop or getattr. from_dict goes through the constructor so that the
+    defaults it applies to missing values stay in one place: a key missing from the
+    document is left out of the call (a slower path, taken only for such documents),
+    unless its field has a decode hook, which receives None instead. _id is always
+    decoded but only encoded when declared.
+
+    Returns:
+        tuple: (to_dict(self) -> dict, from_dict(cls, data) -> instance)
+    """
+    namespace = {}
+    encoded = []
+    decoded = ['_id=get("_id")']
+    # Arguments passed even when the key is missing: _id and fields with a decode hook
+    always = list(decoded)
+    optional = []
+    for index, field in enumerate(fields):
+        value = f"self.{field.source}"
+        if field.encode is not None:
+            namespace[f"encode_{index}"] = field.encode
+            value = f"encode_{index}({value})"
+        encoded.append(f"{field.key!r}: {value}")
+
+        if field.attribute == "_id":
+            continue
+        stored = f"get({field.key!r})"
+        if field.decode is not None:
+            namespace[f"decode_{index}"] = field.decode
+            stored = f"decode_{index}({stored})"
+            always.append(f"{field.attribute}={stored}")
+        else:
+            optional.append(field)
+        decoded.append(f"{field.attribute}={stored}")
+
+    namespace["required_keys"] = frozenset(field.key for field in optional)
+    partial = "".join(
+        f"    if {field.key!r} in data:\n"
+        f"        kwargs[{field.attribute!r}] = data[{field.key!r}]\n"
+        for field in optional
+    )
+
+    source = (
+        "def to_dict(self):\n"
+        f"    return {{{', '.join(encoded)}}}\n"
+        "\n"
+        "def from_dict(cls, data):\n"
+        "    if not data:\n"
+        f"        raise ValueError('Cannot create {cls.__name__} from empty data.')\n"
+        "    get = data.get\n"
+        "    if required_keys <= data.keys():\n"
+        f"        return cls({', '.join(decoded)})\n"
+        f"    kwargs = dict({', '.join(always)})\n"
+        f"{partial}"
+        "    return cls(**kwargs)\n"
+    )
+    exec(compile(source, f"<codec for {cls.__name__}>", "exec"), namespace)
+    return namespace["to_dict"], namespace["from_dict"]
@@ -1,10 +1,56 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel
 from bson import ObjectId
 from datetime import datetime
 from typing import List, Optional, Dict
 import logging
+from classes.base import BaseEntity
+from classes.codec import Field
+
+class Freelancer(BaseEntity):
+    __slots__ = (
+        "_id",
+        "user",
+        "email",
+        "skills",
+        "services",
+        "portfolio",
+        "reviews",
+        "averageRating",
+        "createdAt",
+        "updatedAt",
+    )
+    fields = [
+        Field("user"),
+        Field("email"),
+        Field("skills"),
+        Field("services"),
+        Field("portfolio"),
+        Field("reviews"),
+        Field("averageRating"),
+        Field("createdAt"),
+        Field("updatedAt"),
+    ]
+    collection_name = "Freelancers"
+    indexes = [
+        IndexModel([("email", 1)], unique=True),
+        IndexModel([("user", 1)]),
+        # Multikey: one entry per skill, so skill matches need not scan every freelancer
+        IndexModel([("skills", 1), ("averageRating", -1)]),
+        IndexModel(
+            [("skills", "text"), ("services.service", "text")],
+            weights={"skills": 5, "services.service": 1},
+            name="freelancer_search",
+        ),
+    ]
+    query_shapes = {
+        "_id (from_db)": {"_id": ObjectId()},
+        "email": {"email": ""},
+        "user": {"user": ObjectId()},
+        "skills, averageRating (search.search_freelancers)": {"skills": {"$in": [""]}, "averageRating": {"$gte": 0}},
+        "$text (search.search_freelancers)": {"$text": {"$search": "python"}},
+    }
+    touch_field = "updatedAt"
 
-class Freelancer:
     def __init__(
         self,
         _id: Optional[ObjectId] = None,
@@ -31,25 +77,19 @@ class Freelancer:
 
     def save_to_db(self, db):
         """Save the Freelancer document to MongoDB."""
-        freelancer_data = {
-            "user": self.user,
-            "email": self.email,
-            "skills": self.skills,
-            "services": self.services,
-            "portfolio": self.portfolio,
-            "reviews": self.reviews,
-            "averageRating": self.averageRating,
-            "createdAt": self.createdAt,
-            "updatedAt": self.updatedAt,
-        }
+        freelancer_data = self.to_dict()
         try:
             if self._id:
-                db.update_one({"_id": self._id}, {"$set": freelancer_data})
-                logging.info(f"Freelancer with ID {self._id} updated successfully.")
+                changes = self._changes(freelancer_data)
+                if changes:
+                    db.update_one({"_id": self._id}, changes)
+                    logging.info(f"Freelancer with ID {self._id} updated successfully.")
             else:
                 result = db.insert_one(freelancer_data)
                 self._id = result.inserted_id
                 logging.info(f"Freelancer inserted with ID {self._id}.")
+            self._mark_clean(freelancer_data)
+            self._invalidate(db)
         except Exception as e:
             logging.error(f"Error saving freelancer: {e}")
             raise RuntimeError(f"Failed to save freelancer: {e}")
@@ -58,21 +98,10 @@ class Freelancer:
     def from_db(cls, db, _id: ObjectId):
         """Retrieve a Freelancer document from MongoDB and create an instance."""
         try:
-            data = db.find_one({"_id": _id})
-            if data:
-                logging.info(f"Freelancer with ID {data['_id']} found.")
-                return cls(
-                    _id=data["_id"],
-                    user=data.get("user"),
-                    email=data.get("email"),
-                    skills=data.get("skills", []),
-                    services=data.get("services", []),
-                    portfolio=data.get("portfolio", []),
-                    reviews=data.get("reviews", []),
-                    averageRating=data.get("averageRating"),
-                    createdAt=data.get("createdAt"),
-                    updatedAt=data.get("updatedAt"),
-                )
+            instance = cls._load(db, _id)
+            if instance:
+                logging.info(f"Freelancer with ID {instance._id} found.")
+                return instance
             logging.warning(f"No freelancer found with ID {_id}.")
             return None
         except Exception as e:
@@ -97,6 +126,7 @@ class Freelancer:
         try:
             if self._id:
                 db.delete_one({"_id": self._id})
+                self._invalidate(db, deleted=True)
                 self._id = None
                 logging.info(f"Freelancer with ID {self._id} deleted successfully.")
             else:
@@ -0,0 +1,59 @@
+from bson import ObjectId
+from typing import Iterable, List
+
+
+class PendingEntity:
+    """Handle to an entity queued on an EntityLoader; result() triggers the batched fetch."""
+
+    def __init__(self, loader: "EntityLoader", _id: ObjectId):
+        self._loader = loader
+        self._id = _id
+
+    def result(self):
+        """Returns the loaded instance, or None if no document has this _id."""
+        return self._loader._resolve(self._id)
+
+
+class EntityLoader:
+    """
+    DataLoader-style helper that coalesces by-id lookups of one entity class.
+
+    load() only queues an id. The first result() call fetches every queued id with a
+    single from_db_many, and later results for those ids come from memory. Create
+    one loader per request so that its results do not outlive it.
+
+    Example:
+        freelancers = EntityLoader(Freelancer, db["Freelancers"])
+        pending = [freelancers.load(bid.freelancerId) for bid in project.bids]
+        hired = [freelancers.load(_id) for _id in client.hiredFreelancers]
+        resolved = [entity.result() for entity in pending + hired]  # one $in query
+    """
+
+    def __init__(self, entity_class, db, chunk_size: int = 1000):
+        self.entity_class = entity_class
+        self.db = db
+        self.chunk_size = chunk_size
+        self._queue = {}
+        self._loaded = {}
+
+    def load(self, _id: ObjectId) -> PendingEntity:
+        if _id not in self._loaded:
+            self._queue[_id] = None
+        return PendingEntity(self, _id)
+
+    def load_many(self, ids: Iterable[ObjectId]) -> List[PendingEntity]:
+        return [self.load(_id) for _id in ids]
+
+    def dispatch(self):
+        """Fetches every queued id now."""
+        if not self._queue:
+            return
+        ids = list(self._queue)
+        self._queue.clear()
+        results = self.entity_class.from_db_many(self.db, ids, self.chunk_size)
+        self._loaded.update(zip(ids, results))
+
+    def _resolve(self, _id: ObjectId):
+        if _id not in self._loaded:
+            self.dispatch()
+        return self._loaded.get(_id)
@@ -1,9 +1,32 @@
 from typing import Optional, List
 from bson import ObjectId
+from pymongo import IndexModel
 from datetime import datetime
 import logging
+from classes.base import BaseEntity
+from classes.codec import Field
+from classes.message_bucket import MessageBucket
+
+class Message(BaseEntity):
+    __slots__ = ("_id", "conversationId", "participants", "messages", "lastUpdated")
+    fields = [
+        Field("conversationId"),
+        Field("participants"),
+        Field("messages"),
+        Field("lastUpdated"),
+    ]
+    collection_name = "Messages"
+    indexes = [
+        IndexModel([("conversationId", 1)]),
+        IndexModel([("participants", 1), ("lastUpdated", -1)]),
+    ]
+    query_shapes = {
+        "_id (from_db)": {"_id": ObjectId()},
+        "conversationId": {"conversationId": ""},
+        "participants": {"participants": ObjectId()},
+    }
+    touch_field = "lastUpdated"
 
-class Message:
     def __init__(
         self,
         _id: Optional[ObjectId] = None,
@@ -19,20 +42,19 @@ class Message:
         self.lastUpdated = lastUpdated or datetime.utcnow()
 
     def save_to_db(self, db):
-        message_data = {
-            "conversationId": self.conversationId,
-            "participants": self.participants,
-            "messages": self.messages,
-            "lastUpdated": self.lastUpdated
-        }
+        message_data = self.to_dict()
         try:
             if self._id:
-                db.update_one({"_id": self._id}, {"$set": message_data})
-                logging.info(f"Message with ID {self._id} updated successfully.")
+                changes = self._changes(message_data)
+                if changes:
+                    db.update_one({"_id": self._id}, changes)
+                    logging.info(f"Message with ID {self._id} updated successfully.")
             else:
                 result = db.insert_one(message_data)
                 self._id = result.inserted_id
                 logging.info(f"Message inserted with ID {self._id}.")
+            self._mark_clean(message_data)
+            self._invalidate(db)
         except Exception as e:
             logging.error(f"Error saving message: {e}")
             raise RuntimeError(f"Failed to save message: {e}")
@@ -40,16 +62,10 @@ class Message:
     @classmethod
     def from_db(cls, db, _id: ObjectId):
         try:
-            data = db.find_one({"_id": _id})
-            if data:
-                logging.info(f"Message with ID {data['_id']} found.")
-                return cls(
-                    _id=data["_id"],
-                    conversationId=data.get("conversationId"),
-                    participants=data.get("participants", []),
-                    messages=data.get("messages", []),
-                    lastUpdated=data.get("lastUpdated"),
-                )
+            instance = cls._load(db, _id)
+            if instance:
+                logging.info(f"Message with ID {instance._id} found.")
+                return instance
             logging.warning(f"No message found with ID {_id}.")
             return None
         except Exception as e:
@@ -72,6 +88,7 @@ class Message:
         try:
             if self._id:
                 db.delete_one({"_id": self._id})
+                self._invalidate(db, deleted=True)
                 self._id = None
                 logging.info(f"Message with ID {self._id} deleted successfully.")
             else:
@@ -83,25 +100,59 @@ class Message:
     def __repr__(self):
         return f"Message(conversationId={self.conversationId}, participants={self.participants})"
 
-    def add_reply(self, reply_to_message_id: ObjectId, reply_content: str, sender_id: ObjectId, db):
+    def _append_message(self, message: dict, db, buckets=None):
+        """
+        Appends one message without rewriting the conversation.
+
+        With a buckets collection the message goes to the conversation's MessageBucket
+        and only lastUpdated is written here; otherwise it is $pushed onto the embedded array.
+        """
+        self.lastUpdated = datetime.utcnow()
+        if self._id is None:
+            if buckets is None:
+                self.messages.append(message)
+            self.save_to_db(db)
+            if buckets is not None:
+                MessageBucket.push(buckets, self.conversationId, message)
+            return
+        try:
+            if buckets is not None:
+                MessageBucket.push(buckets, self.conversationId, message)
+                db.update_one({"_id": self._id}, {"$set": {"lastUpdated": self.lastUpdated}})
+                written = ["lastUpdated"]
+            else:
+                self.messages.append(message)
+                db.update_one(
+                    {"_id": self._id},
+                    {"$push": {"messages": message}, "$set": {"lastUpdated": self.lastUpdated}},
+                )
+                written = ["messages", "lastUpdated"]
+            # Other pending modifications, e.g. to participants, stay dirty for the next save
+            self._mark_clean(fields=written)
+            self._invalidate(db)
+            logging.info(f"Message appended to conversation {self.conversationId}.")
+        except Exception as e:
+            logging.error(f"Error appending to message with ID {self._id}: {e}")
+            raise RuntimeError(f"Failed to append message: {e}")
+
+    def add_reply(self, reply_to_message_id: ObjectId, reply_content: str, sender_id: ObjectId, db, buckets=None):
         reply = {
             "senderId": sender_id,
             "content": reply_content,
             "timestamp": datetime.utcnow(),
             "repliedToMessageId": reply_to_message_id,
             "read": False,
-            "replyTo": ReplyTo(
-                messageId=reply_to_message_id,
-                content=reply_content,
-                senderId=sender_id,
-                timestamp=datetime.utcnow()
-            ).to_dict(),
+            "replyTo": {
+                "messageId": reply_to_message_id,
+                "content": reply_content,
+                "senderId": sender_id,
+                "timestamp": datetime.utcnow()
+            },
             "attachments": []
         }
-        self.messages.append(reply)
-        self.update(db, messages=self.messages)
+        self._append_message(reply, db, buckets)
 
-    def forward_message(self, message_id: ObjectId, db):
+    def forward_message(self, message_id: ObjectId, db, buckets=None):
         forwarded_message = {
             "senderId": message_id,
             "content": "Forwarded message",
@@ -109,5 +160,18 @@ class Message:
             "forwardedFromMessageId": message_id,
             "attachments": []
         }
-        self.messages.append(forwarded_message)
-        self.update(db, messages=self.messages)
+        self._append_message(forwarded_message, db, buckets)
+
+    def move_to_buckets(self, db, buckets):
+        """
+        Moves the embedded messages array into MessageBuckets and empties it on the conversation.
+
+        Must run before any message is appended with buckets: raises ValueError once
+        the conversation has buckets.
+        """
+        MessageBucket.insert_messages(buckets, self.conversationId, self.messages)
+        self.update(db, messages=[])
+
+    def read_history(self, buckets, before=None, limit: int = 50):
+        """Returns a page of this conversation's bucketed messages, newest first, and the next cursor."""
+        return MessageBucket.history(buckets, self.conversationId, before, limit)
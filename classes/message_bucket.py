@@ -0,0 +1,126 @@
+from bson import ObjectId
+from pymongo import IndexModel, ReturnDocument
+from datetime import datetime
+from typing import List, Optional, Tuple
+import logging
+
+
+class MessageBucket:
+    """
+    Stores the messages of a conversation in fixed-size bucket documents.
+
+    Each bucket holds at most bucket_size messages in send order, and newer buckets
+    have greater _ids. Appending is a single atomic $push into the conversation's
+    newest open bucket, so a reply costs the same whatever the length of the
+    conversation. Buckets marked closed take no more messages even if not full.
+    """
+
+    collection_name = "MessageBuckets"
+    bucket_size = 100
+    indexes = [
+        IndexModel([("conversationId", 1), ("_id", -1)]),
+    ]
+    query_shapes = {
+        "conversationId (history, insert_messages)": {"conversationId": ""},
+    }
+
+    @classmethod
+    def push(cls, db, conversation_id: str, message: dict):
+        """Appends a message to the conversation's newest open bucket, starting a new bucket when it is full."""
+        now = datetime.utcnow()
+        try:
+            bucket = db.find_one_and_update(
+                {"conversationId": conversation_id, "count": {"$lt": cls.bucket_size}, "closed": {"$ne": True}},
+                {
+                    "$push": {"messages": message},
+                    "$inc": {"count": 1},
+                    "$set": {"lastTimestamp": now},
+                    "$setOnInsert": {"firstTimestamp": now},
+                },
+                projection={"count": 1},
+                sort=[("_id", -1)],
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            if bucket["count"] == 1:
+                # A new bucket; concurrent pushes may have started others before it. Close
+                # those, so no later message lands in a bucket older than this one.
+                db.update_many(
+                    {"conversationId": conversation_id, "_id": {"$lt": bucket["_id"]},
+                     "count": {"$lt": cls.bucket_size}, "closed": {"$ne": True}},
+                    {"$set": {"closed": True}},
+                )
+        except Exception as e:
+            logging.error(f"Error appending message to conversation {conversation_id}: {e}")
+            raise RuntimeError(f"Failed to append message: {e}")
+
+    @classmethod
+    def insert_messages(cls, db, conversation_id: str, messages: List[dict]):
+        """
+        Writes already existing messages as full buckets, e.g. when moving an embedded array.
+
+        Only a conversation without buckets can be filled this way: the new buckets
+        get newer _ids than existing ones, so history would list older messages as newer.
+        """
+        if not messages:
+            return
+        if db.count_documents({"conversationId": conversation_id}, limit=1):
+            raise ValueError(f"Conversation {conversation_id} already has message buckets.")
+        now = datetime.utcnow()
+        buckets = [
+            {
+                "conversationId": conversation_id,
+                "count": len(messages[start:start + cls.bucket_size]),
+                "messages": messages[start:start + cls.bucket_size],
+                "firstTimestamp": now,
+                "lastTimestamp": now,
+            }
+            for start in range(0, len(messages), cls.bucket_size)
+        ]
+        try:
+            db.insert_many(buckets)
+        except Exception as e:
+            logging.error(f"Error writing buckets for conversation {conversation_id}: {e}")
+            raise RuntimeError(f"Failed to write message buckets: {e}")
+
+    @classmethod
+    def history(
+        cls,
+        db,
+        conversation_id: str,
+        before: Optional[Tuple[ObjectId, int]] = None,
+        limit: int = 50,
+    ) -> Tuple[List[dict], Optional[Tuple[ObjectId, int]]]:
+        """
+        Reads a page of a conversation's messages, newest first.
+
+        Parameters:
+            db (Collection): The MessageBuckets collection.
+            conversation_id (str): The conversation to read.
+            before (tuple): The cursor returned by the previous call, or None to start at the newest message.
+            limit (int): Maximum number of messages to return.
+
+        Returns:
+            tuple: The messages, and the cursor of the next page (None when the history is exhausted).
+        """
+        query = {"conversationId": conversation_id}
+        if before is not None:
+            query["_id"] = {"$lte": before[0]}
+
+        page = []
+        try:
+            buckets = db.find(query, {"messages": 1}).sort("_id", -1).batch_size(max(1, limit // cls.bucket_size + 1))
+            for bucket in buckets:
+                messages = bucket.get("messages", [])
+                end = len(messages)
+                if before is not None and bucket["_id"] == before[0]:
+                    end = min(end, before[1])
+                for index in range(end - 1, -1, -1):
+                    if len(page) == limit:
+                        buckets.close()
+                        return page, (bucket["_id"], index + 1)
+                    page.append(messages[index])
+        except Exception as e:
+            logging.error(f"Error reading history of conversation {conversation_id}: {e}")
+            raise RuntimeError(f"Failed to read message history: {e}")
+        return page, None
@@ -1,9 +1,37 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel
 from bson import ObjectId
 from datetime import datetime, date
-from typing import Optional
+from typing import Iterable, Optional
+from classes.base import BaseEntity
+from classes.codec import Field
+from classes.cache import entity_cache
+
+def _as_datetime(value):
+    # Plain dates are read as midnight of that day
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime.combine(value, datetime.min.time())
+    return value
+
+class Notification(BaseEntity):
+    __slots__ = ("_id", "userId", "type", "content", "link", "read", "timestamp")
+    fields = [
+        Field("userId"),
+        Field("type"),
+        Field("content"),
+        Field("link"),
+        Field("read"),
+        Field("timestamp", decode=_as_datetime),
+    ]
+    collection_name = "Notifications"
+    indexes = [
+        IndexModel([("userId", 1), ("read", 1), ("timestamp", -1)]),
+    ]
+    query_shapes = {
+        "_id (from_db)": {"_id": ObjectId()},
+        "userId": {"userId": ObjectId()},
+        "userId, unread (unread_count, mark_all_read)": {"userId": ObjectId(), "read": False},
+    }
 
-class Notification:
     def __init__(
         self,
         _id: Optional[ObjectId] = None,
@@ -23,42 +51,66 @@ class Notification:
         self.timestamp = timestamp or datetime.utcnow()
 
     def save_to_db(self, db):
-        notification_data = {
-            "userId": self.userId,
-            "type": self.type,
-            "content": self.content,
-            "link": self.link,
-            "read": self.read,
-            "timestamp": self.timestamp
-        }
+        notification_data = self.to_dict()
         if self._id:
-            db.update_one({"_id": self._id}, {"$set": notification_data})
+            changes = self._changes(notification_data)
+            if changes:
+                db.update_one({"_id": self._id}, changes)
         else:
             result = db.insert_one(notification_data)
             self._id = result.inserted_id
+        self._mark_clean(notification_data)
+        self._invalidate(db)
 
     @classmethod
     def from_db(cls, db, _id: ObjectId):
-        data = db.find_one({"_id": _id})
-        if data:
-            timestamp = data.get("timestamp")
-            if isinstance(timestamp, date):
-                timestamp = datetime.combine(timestamp, datetime.min.time())
-            return cls(
-                _id=data["_id"],
-                userId=data.get("userId"),
-                type=data.get("type", ""),
-                content=data.get("content", ""),
-                link=data.get("link"),
-                read=data.get("read", False),
-                timestamp=timestamp
-            )
-        return None
+        return cls._load(db, _id)
 
     def mark_as_read(self, db):
         self.read = True
         self.save_to_db(db)
 
+    @classmethod
+    def mark_all_read(cls, db, user_id: ObjectId, before: Optional[datetime] = None) -> int:
+        """Marks all of a user's unread notifications (up to before, if given) as read with one update_many."""
+        query = {"userId": user_id, "read": False}
+        if before is not None:
+            query["timestamp"] = {"$lte": before}
+        modified = db.update_many(query, {"$set": {"read": True}}).modified_count
+        if modified:
+            entity_cache.invalidate_collection(db.full_name)
+        return modified
+
+    @classmethod
+    def unread_count(cls, db, user_id: ObjectId) -> int:
+        """Counts a user's unread notifications; served by the (userId, read, timestamp) index."""
+        return db.count_documents({"userId": user_id, "read": False})
+
+    @classmethod
+    def fan_out(
+        cls,
+        db,
+        user_ids: Iterable[ObjectId],
+        type: str,
+        content: str,
+        link: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> int:
+        """
+        Creates the same notification for every user id, batch_size inserts per round trip.
+
+        user_ids is consumed lazily, so it can be a cursor or generator over any number of users.
+
+        Returns:
+            int: The number of notifications created.
+        """
+        timestamp = datetime.utcnow()
+        notifications = (
+            cls(userId=user_id, type=type, content=content, link=link, timestamp=timestamp)
+            for user_id in user_ids
+        )
+        return cls.save_many(db, notifications, batch_size)["inserted"]
+
     def update(self, db, **kwargs):
         for key, value in kwargs.items():
             if hasattr(self, key):
@@ -68,6 +120,7 @@ class Notification:
     def delete(self, db):
         if self._id:
             db.delete_one({"_id": self._id})
+            self._invalidate(db, deleted=True)
             self._id = None
 
     def __repr__(self):
@@ -1,9 +1,48 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel
+from pymongo.errors import PyMongoError
 from bson import ObjectId
 from datetime import datetime
 from typing import Optional
+import logging
+from classes.base import BaseEntity
+from classes.codec import Field
+from classes import rollups
+
+def _stored_datetime(value):
+    # Anything but a datetime is dropped, and the constructor falls back to now
+    return value if isinstance(value, datetime) else None
+
+class Payment(BaseEntity):
+    __slots__ = (
+        "_id",
+        "projectId",
+        "clientId",
+        "freelancerId",
+        "amount",
+        "paymentStatus",
+        "timestamp",
+    )
+    fields = [
+        Field("projectId"),
+        Field("clientId"),
+        Field("freelancerId"),
+        Field("amount"),
+        Field("paymentStatus"),
+        Field("timestamp", decode=_stored_datetime),
+    ]
+    collection_name = "Payments"
+    indexes = [
+        IndexModel([("projectId", 1)]),
+        IndexModel([("freelancerId", 1)]),
+        IndexModel([("clientId", 1)]),
+    ]
+    query_shapes = {
+        "_id (from_db)": {"_id": ObjectId()},
+        "projectId": {"projectId": ObjectId()},
+        "freelancerId": {"freelancerId": ObjectId()},
+        "clientId": {"clientId": ObjectId()},
+    }
 
-class Payment:
     def __init__(
         self,
         _id: Optional[ObjectId] = None,
@@ -23,35 +62,82 @@ class Payment:
         self.timestamp = timestamp or datetime.utcnow()
 
     def save_to_db(self, db):
-        payment_data = {
-            "projectId": self.projectId,
-            "clientId": self.clientId,
-            "freelancerId": self.freelancerId,
-            "amount": self.amount,
-            "paymentStatus": self.paymentStatus,
-            "timestamp": self.timestamp
-        }
+        """
+        Save the Payment document to MongoDB and update the payment rollups.
+
+        Updates read back the previous document in the same round trip, so the
+        rollups move exactly the contribution that changed.
+        """
+        payment_data = self.to_dict()
         if self._id:
-            db.update_one({"_id": self._id}, {"$set": payment_data})
+            changes = self._changes(payment_data)
+            if changes:
+                previous = db.find_one_and_update({"_id": self._id}, changes)
+                if previous is not None:
+                    rollups.record_payment(db.database, previous, payment_data)
         else:
             result = db.insert_one(payment_data)
             self._id = result.inserted_id
+            rollups.record_payment(db.database, None, payment_data)
+        self._mark_clean(payment_data)
+        self._invalidate(db)
 
     @classmethod
     def from_db(cls, db, _id: ObjectId):
-        data = db.find_one({"_id": _id})
-        if data:
-            timestamp = data["timestamp"] if isinstance(data["timestamp"], datetime) else datetime.utcnow()
-            return cls(
-                _id=data["_id"],
-                projectId=data["projectId"],
-                clientId=data["clientId"],
-                freelancerId=data["freelancerId"],
-                amount=data["amount"],
-                paymentStatus=data["paymentStatus"],
-                timestamp=timestamp
-            )
-        return None
+        return cls._load(db, _id)
+
+    @classmethod
+    def _before_batch_write(cls, collection, batch):
+        """Reads the stored documents of the batch's existing payments, whose rollup contribution is replaced."""
+        ids = [payment._id for payment in batch if payment._id is not None]
+        if not ids:
+            return {}
+        return {document["_id"]: document for document in collection.find({"_id": {"$in": ids}})}
+
+    @classmethod
+    def _after_batch_write(cls, collection, written, previous):
+        # previous was read before the batch, so a concurrent write in between is not accounted for
+        rollups.record_payments(collection.database, [
+            (previous.get(payment._id), document) for payment, document in written
+        ])
+
+    async def async_save(self, db) -> ObjectId:
+        """Async counterpart of save_to_db, updating the payment rollups the same way."""
+        self._validate()
+        document = self.to_dict()
+        try:
+            if self._id is None:
+                result = await db.insert_one(document)
+                self._id = result.inserted_id
+                await rollups.async_record_payment(db.database, None, document)
+            else:
+                changes = self._changes(document)
+                if changes:
+                    upsert = self._snapshot is None
+                    previous = await db.find_one_and_update({"_id": self._id}, changes, upsert=upsert)
+                    if previous is not None or upsert:
+                        await rollups.async_record_payment(db.database, previous, document)
+        except PyMongoError as e:
+            logging.error(f"Error saving Payment: {e}")
+            raise RuntimeError(f"Failed to save Payment: {e}")
+        self._mark_clean(document)
+        self._invalidate(db)
+        return self._id
+
+    async def async_delete(self, db) -> bool:
+        """Deletes the payment and removes its contribution from the rollups; returns True if it existed."""
+        if not self._id:
+            return False
+        try:
+            previous = await db.find_one_and_delete({"_id": self._id})
+            if previous is not None:
+                await rollups.async_record_payment(db.database, previous, None)
+        except PyMongoError as e:
+            logging.error(f"Error deleting Payment with ID {self._id}: {e}")
+            raise RuntimeError(f"Failed to delete Payment: {e}")
+        self._invalidate(db, deleted=True)
+        self._id = None
+        return previous is not None
 
     def update_status(self, db, status: str):
         self.paymentStatus = status
@@ -60,5 +146,8 @@ class Payment:
 
     def delete(self, db):
         if self._id:
-            db.delete_one({"_id": self._id})
+            previous = db.find_one_and_delete({"_id": self._id})
+            if previous is not None:
+                rollups.record_payment(db.database, previous, None)
+            self._invalidate(db, deleted=True)
             self._id = None
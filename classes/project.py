@@ -1,9 +1,14 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel
 from bson import ObjectId
 from datetime import datetime
 from typing import List, Optional
+from classes.base import BaseEntity
+from classes.codec import Field
+from classes import rollups
 
 class Bid:
+    __slots__ = ("freelancerId", "bidAmount", "message", "date")
+
     def __init__(self, freelancerId: ObjectId, bidAmount: float, message: str, date: Optional[datetime] = None):
         self.freelancerId = freelancerId
         self.bidAmount = bidAmount
@@ -19,6 +24,8 @@ class Bid:
         }
 
 class Review:
+    __slots__ = ("rating", "comment", "date")
+
     def __init__(self, rating: int, comment: str, date: Optional[datetime] = None):
         self.rating = rating
         self.comment = comment
@@ -32,6 +39,8 @@ class Review:
         }
 
 class Status:
+    __slots__ = ("type", "lastUpdated")
+
     def __init__(self, type: str, lastUpdated: Optional[datetime] = None):
         self.type = type
         self.lastUpdated = lastUpdated or datetime.utcnow()
@@ -42,7 +51,68 @@ class Status:
             "lastUpdated": self.lastUpdated
         }
 
-class Project:
+def _encode_bids(bids):
+    # Bids that were never accessed are still their stored documents
+    return [bid if isinstance(bid, dict) else bid.to_dict() for bid in bids]
+
+def _bid_amount(bid):
+    return bid["bidAmount"] if isinstance(bid, dict) else bid.bidAmount
+
+def _decode_status(status):
+    return Status(**status) if status else None
+
+class Project(BaseEntity):
+    __slots__ = (
+        "_id",
+        "title",
+        "description",
+        "clientId",
+        "freelancerId",
+        "budget",
+        "_bids",
+        "status",
+        "reviews",
+        "createdAt",
+        "updatedAt",
+        "bidCount",
+        "minBid",
+    )
+    fields = [
+        Field("title"),
+        Field("description"),
+        Field("clientId"),
+        Field("freelancerId"),
+        Field("budget"),
+        Field("bids", encode=_encode_bids, source="_bids"),
+        Field("status", encode=Status.to_dict, decode=_decode_status),
+        Field("reviews"),
+        Field("createdAt"),
+        Field("updatedAt"),
+        Field("bidCount"),
+        Field("minBid"),
+    ]
+    collection_name = "Projects"
+    indexes = [
+        IndexModel([("clientId", 1), ("freelancerId", 1)]),
+        IndexModel([("freelancerId", 1)]),
+        IndexModel([("status.type", 1)]),
+        IndexModel([("budget", 1)]),
+        IndexModel(
+            [("title", "text"), ("description", "text")],
+            weights={"title": 10, "description": 1},
+            name="project_search",
+        ),
+    ]
+    query_shapes = {
+        "_id (from_db)": {"_id": ObjectId()},
+        "clientId": {"clientId": ObjectId()},
+        "freelancerId": {"freelancerId": ObjectId()},
+        "status.type": {"status.type": "Open"},
+        "budget range": {"budget": {"$gte": 0, "$lte": 1000}},
+        "$text (search.search_projects)": {"$text": {"$search": "python"}},
+    }
+    touch_field = "updatedAt"
+
     def __init__(
         self,
         _id: Optional[ObjectId] = None,
@@ -55,7 +125,9 @@ class Project:
         status: Status = None,
         reviews: dict = None,
         createdAt: Optional[datetime] = None,
-        updatedAt: Optional[datetime] = None
+        updatedAt: Optional[datetime] = None,
+        bidCount: Optional[int] = None,
+        minBid: Optional[float] = None
     ):
         self._id = _id
         self.title = title
@@ -71,54 +143,80 @@ class Project:
         }
         self.createdAt = createdAt or datetime.utcnow()
         self.updatedAt = updatedAt or datetime.utcnow()
+        # Running totals over every bid ever placed, even those trimmed from bids by max_bids
+        self.bidCount = bidCount if bidCount is not None else len(self._bids)
+        self.minBid = minBid if minBid is not None else min(map(_bid_amount, self._bids), default=None)
+
+    @property
+    def bids(self) -> List[Bid]:
+        """The project's bids; loaded projects decode them from their documents on first access."""
+        if self._bids and isinstance(self._bids[0], dict):
+            self._bids = [Bid(**bid) for bid in self._bids]
+        return self._bids
+
+    @bids.setter
+    def bids(self, bids: List[Bid]):
+        self._bids = bids
 
     def save_to_db(self, db):
         """Save the Project document to MongoDB."""
-        project_data = {
-            "title": self.title,
-            "description": self.description,
-            "clientId": self.clientId,
-            "freelancerId": self.freelancerId,
-            "budget": self.budget,
-            "bids": [bid.to_dict() for bid in self.bids],
-            "status": self.status.to_dict(),
-            "reviews": self.reviews,
-            "createdAt": self.createdAt,
-            "updatedAt": self.updatedAt
-        }
+        project_data = self.to_dict()
         if self._id:
-            db.update_one({"_id": self._id}, {"$set": project_data})
+            changes = self._changes(project_data)
+            if changes:
+                db.update_one({"_id": self._id}, changes)
         else:
             result = db.insert_one(project_data)
             self._id = result.inserted_id
+        self._mark_clean(project_data)
+        self._invalidate(db)
 
     @classmethod
     def from_db(cls, db, _id: ObjectId):
         """Retrieve a Project document from MongoDB and create an instance."""
-        data = db.find_one({"_id": _id})
-        if data:
-            bids = [Bid(**bid) for bid in data.get("bids", [])]
-            status = Status(**data.get("status", {}))
-            return cls(
-                _id=data["_id"],
-                title=data["title"],
-                description=data["description"],
-                clientId=data["clientId"],
-                freelancerId=data.get("freelancerId"),
-                budget=data["budget"],
-                bids=bids,
-                status=status,
-                reviews=data.get("reviews", {}),
-                createdAt=data["createdAt"],
-                updatedAt=data["updatedAt"]
-            )
-        return None
+        return cls._load(db, _id)
+
+    def add_bid(self, db, freelancerId: ObjectId, bidAmount: float, message: str, max_bids: Optional[int] = None):
+        """
+        Add a new bid to the project.
 
-    def add_bid(self, db, freelancerId: ObjectId, bidAmount: float, message: str):
-        """Add a new bid to the project."""
+        The bid is appended server-side with a single atomic pipeline update that also
+        maintains bidCount and minBid and bumps updatedAt, so concurrent bidders never
+        overwrite each other.
+        Both totals are computed from the stored bids when they are missing or null
+        (projects saved without bids store minBid as null, which $min would never
+        replace). With max_bids only the most recent max_bids bids are kept in the
+        array. The bidder's FreelancerStats are incremented after the write.
+        """
         bid = Bid(freelancerId=freelancerId, bidAmount=bidAmount, message=message)
         self.bids.append(bid)
-        self.save_to_db(db)
+        # Bumped so that pollers of updatedAt, such as the viewer's live mode, see the bid
+        self.updatedAt = datetime.utcnow()
+        if max_bids is not None:
+            self.bids = self.bids[-max_bids:]
+        self.bidCount += 1
+        self.minBid = bidAmount if self.minBid is None else min(self.minBid, bidAmount)
+        if not self._id:
+            self.save_to_db(db)
+        else:
+            stored_bids = {"$ifNull": ["$bids", []]}
+            # $literal keeps a message starting with $ from being read as a field path
+            bids = {"$concatArrays": [stored_bids, [{"$literal": bid.to_dict()}]]}
+            if max_bids is not None:
+                bids = {"$slice": [bids, -max_bids]}
+            db.update_one(
+                {"_id": self._id},
+                [{"$set": {
+                    "bids": bids,
+                    "bidCount": {"$add": [{"$ifNull": ["$bidCount", {"$size": stored_bids}]}, 1]},
+                    # $min ignores nulls, so a null minBid with no stored bids becomes bidAmount
+                    "minBid": {"$min": [{"$ifNull": ["$minBid", {"$min": "$bids.bidAmount"}]}, bidAmount]},
+                    "updatedAt": self.updatedAt,
+                }}],
+            )
+            self._mark_clean(fields=["bids", "bidCount", "minBid", "updatedAt"])
+            self._invalidate(db)
+        rollups.record_bid(db.database, freelancerId, bidAmount)
 
     def update_status(self, db, status_type: str):
         """Update the project status."""
@@ -127,17 +225,36 @@ class Project:
         self.save_to_db(db)
 
     def add_review(self, db, review_type: str, rating: int, comment: str):
-        """Add a review for the client or freelancer."""
-        review = Review(rating=rating, comment=comment)
-        if review_type == 'client':
-            self.reviews['clientReview'] = review.to_dict()
-        elif review_type == 'freelancer':
-            self.reviews['freelancerReview'] = review.to_dict()
+        """
+        Add a review for the client or freelancer.
+
+        Only the reviewed slot and updatedAt are $set, so a concurrent review of the
+        other party is not overwritten. A freelancer review also updates the hired
+        freelancer's FreelancerStats, replacing the rating of the review it overwrites.
+        """
+        fields = {'client': 'clientReview', 'freelancer': 'freelancerReview'}
+        if review_type not in fields:
+            raise ValueError("review_type must be 'client' or 'freelancer'.")
+        review = Review(rating=rating, comment=comment).to_dict()
+        previous = self.reviews.get(fields[review_type])
+        self.reviews[fields[review_type]] = review
         self.updatedAt = datetime.utcnow()
-        self.save_to_db(db)
+        if not self._id:
+            self.save_to_db(db)
+        else:
+            db.update_one(
+                {"_id": self._id},
+                {"$set": {f"reviews.{fields[review_type]}": review, "updatedAt": self.updatedAt}},
+            )
+            self._mark_clean(fields=["reviews", "updatedAt"])
+            self._invalidate(db)
+        if review_type == 'freelancer' and self.freelancerId is not None:
+            previous_rating = previous.get("rating") if previous else None
+            rollups.record_review(db.database, self.freelancerId, rating, previous_rating)
 
     def delete(self, db):
         """Delete the Project document from MongoDB."""
         if self._id:
             db.delete_one({"_id": self._id})
+            self._invalidate(db, deleted=True)
             self._id = None
@@ -0,0 +1,294 @@
+from bson import ObjectId
+from pymongo import IndexModel, UpdateOne
+from datetime import datetime, timezone
+from typing import List, Optional
+import logging
+
+# Payments and Projects are the sources of every rollup; these are their collection names
+PAYMENTS = "Payments"
+PROJECTS = "Projects"
+
+
+def _day(timestamp: datetime) -> str:
+    """The UTC day of a timestamp, as used for DailyPayments _ids."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.strftime("%Y-%m-%d")
+
+
+def _completed_amount():
+    return {"$cond": [{"$eq": ["$paymentStatus", "Completed"]}, "$amount", 0]}
+
+
+class FreelancerStats:
+    """
+    Per-freelancer totals: payments and completed revenue, bids placed and freelancer review ratings.
+
+    Documents are keyed by the freelancer's _id. averageRating and averageBid are
+    derived from the stored sums when read.
+    """
+
+    collection_name = "FreelancerStats"
+    indexes = [
+        IndexModel([("revenue", -1)]),
+    ]
+    query_shapes = {
+        "_id (get)": {"_id": ObjectId()},
+        "revenue > 0 (top_by_revenue)": {"revenue": {"$gt": 0}},
+    }
+
+    @classmethod
+    def get(cls, db, freelancer_id: ObjectId) -> Optional[dict]:
+        """Returns the freelancer's stats, or None if nothing was recorded for them."""
+        stats = db.find_one({"_id": freelancer_id})
+        if stats is None:
+            return None
+        stats["averageRating"] = stats["ratingSum"] / stats["reviews"] if stats.get("reviews") else None
+        stats["averageBid"] = stats["bidAmount"] / stats["bids"] if stats.get("bids") else None
+        return stats
+
+    @classmethod
+    def top_by_revenue(cls, db, limit: int = 20) -> List[dict]:
+        return list(db.find({"revenue": {"$gt": 0}}).sort("revenue", -1).limit(limit))
+
+    @classmethod
+    def rebuild(cls, database):
+        """Recomputes every document from Payments and Projects."""
+        merge = {"$merge": {"into": cls.collection_name, "whenMatched": "merge", "whenNotMatched": "insert"}}
+        database[cls.collection_name].delete_many({})
+        database[PAYMENTS].aggregate([
+            {"$match": {"freelancerId": {"$ne": None}}},
+            {"$group": {"_id": "$freelancerId", "payments": {"$sum": 1}, "revenue": {"$sum": _completed_amount()}}},
+            merge,
+        ], allowDiskUse=True)
+        # Only the bids still stored count; bids trimmed by add_bid(max_bids=...) are lost
+        database[PROJECTS].aggregate([
+            {"$unwind": "$bids"},
+            {"$group": {"_id": "$bids.freelancerId", "bids": {"$sum": 1}, "bidAmount": {"$sum": "$bids.bidAmount"}}},
+            merge,
+        ], allowDiskUse=True)
+        database[PROJECTS].aggregate([
+            {"$match": {"freelancerId": {"$ne": None}, "reviews.freelancerReview.rating": {"$type": "number"}}},
+            {"$group": {
+                "_id": "$freelancerId",
+                "reviews": {"$sum": 1},
+                "ratingSum": {"$sum": "$reviews.freelancerReview.rating"},
+            }},
+            merge,
+        ], allowDiskUse=True)
+
+
+class ClientSpend:
+    """Per-client payment count and completed spend, keyed by the client's _id."""
+
+    collection_name = "ClientSpend"
+    indexes = [
+        IndexModel([("spent", -1)]),
+    ]
+    query_shapes = {
+        "_id (get)": {"_id": ObjectId()},
+        "spent > 0 (top_by_spend)": {"spent": {"$gt": 0}},
+    }
+
+    @classmethod
+    def get(cls, db, client_id: ObjectId) -> Optional[dict]:
+        return db.find_one({"_id": client_id})
+
+    @classmethod
+    def top_by_spend(cls, db, limit: int = 20) -> List[dict]:
+        return list(db.find({"spent": {"$gt": 0}}).sort("spent", -1).limit(limit))
+
+    @classmethod
+    def rebuild(cls, database):
+        """Recomputes every document from Payments."""
+        database[cls.collection_name].delete_many({})
+        database[PAYMENTS].aggregate([
+            {"$match": {"clientId": {"$ne": None}}},
+            {"$group": {"_id": "$clientId", "payments": {"$sum": 1}, "spent": {"$sum": _completed_amount()}}},
+            {"$merge": {"into": cls.collection_name, "whenMatched": "replace", "whenNotMatched": "insert"}},
+        ], allowDiskUse=True)
+
+
+class DailyPayments:
+    """
+    Per-day payment count, amount, completed revenue and count per paymentStatus.
+
+    Documents are keyed by the UTC day as "YYYY-MM-DD", so a date range is an _id range.
+    """
+
+    collection_name = "DailyPayments"
+    indexes = []
+    query_shapes = {
+        "_id range (between)": {"_id": {"$gte": "", "$lte": ""}},
+    }
+
+    @classmethod
+    def between(cls, db, start: datetime, end: datetime) -> List[dict]:
+        """Returns the days from start to end (inclusive) that had payments, in order."""
+        return list(db.find({"_id": {"$gte": _day(start), "$lte": _day(end)}}).sort("_id", 1))
+
+    @classmethod
+    def rebuild(cls, database):
+        """Recomputes every document from Payments."""
+        database[cls.collection_name].delete_many({})
+        database[PAYMENTS].aggregate([
+            {"$match": {"timestamp": {"$type": "date"}}},
+            {"$group": {
+                "_id": {
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                    "status": {"$ifNull": ["$paymentStatus", "Unknown"]},
+                },
+                "count": {"$sum": 1},
+                "amount": {"$sum": "$amount"},
+                "revenue": {"$sum": _completed_amount()},
+            }},
+            {"$group": {
+                "_id": "$_id.day",
+                "count": {"$sum": "$count"},
+                "amount": {"$sum": "$amount"},
+                "revenue": {"$sum": "$revenue"},
+                "statuses": {"$push": {"k": "$_id.status", "v": "$count"}},
+            }},
+            {"$set": {"statuses": {"$arrayToObject": "$statuses"}}},
+            {"$merge": {"into": cls.collection_name, "whenMatched": "replace", "whenNotMatched": "insert"}},
+        ], allowDiskUse=True)
+
+
+ROLLUP_CLASSES = [FreelancerStats, ClientSpend, DailyPayments]
+
+
+def _payment_increments(payment: dict, sign: int):
+    """Yields the (collection name, _id, increments) a payment document contributes, negated when sign is -1."""
+    amount = payment.get("amount") or 0
+    revenue = amount if payment.get("paymentStatus") == "Completed" else 0
+    if payment.get("freelancerId") is not None:
+        yield FreelancerStats.collection_name, payment["freelancerId"], {"payments": sign, "revenue": sign * revenue}
+    if payment.get("clientId") is not None:
+        yield ClientSpend.collection_name, payment["clientId"], {"payments": sign, "spent": sign * revenue}
+    if isinstance(payment.get("timestamp"), datetime):
+        yield DailyPayments.collection_name, _day(payment["timestamp"]), {
+            "count": sign,
+            "amount": sign * amount,
+            "revenue": sign * revenue,
+            f"statuses.{payment.get('paymentStatus') or 'Unknown'}": sign,
+        }
+
+
+def _requests(contributions):
+    """Sums the contributions per rollup document into one upserting $inc each, grouped by collection."""
+    increments = {}
+    for collection_name, _id, fields in contributions:
+        totals = increments.setdefault((collection_name, _id), {})
+        for field, value in fields.items():
+            totals[field] = totals.get(field, 0) + value
+
+    requests = {}
+    for (collection_name, _id), totals in increments.items():
+        totals = {field: value for field, value in totals.items() if value}
+        if totals:
+            requests.setdefault(collection_name, []).append(UpdateOne({"_id": _id}, {"$inc": totals}, upsert=True))
+    return requests
+
+
+def _apply(database, contributions):
+    try:
+        for collection_name, operations in _requests(contributions).items():
+            database[collection_name].bulk_write(operations, ordered=False)
+    except Exception as e:
+        logging.error(f"Error updating rollups: {e}")
+        raise RuntimeError(f"Failed to update rollups: {e}")
+
+
+async def _async_apply(database, contributions):
+    """_apply for a Motor database."""
+    try:
+        for collection_name, operations in _requests(contributions).items():
+            await database[collection_name].bulk_write(operations, ordered=False)
+    except Exception as e:
+        logging.error(f"Error updating rollups: {e}")
+        raise RuntimeError(f"Failed to update rollups: {e}")
+
+
+def _payment_changes(changes):
+    contributions = []
+    for before, after in changes:
+        if before is not None:
+            contributions.extend(_payment_increments(before, -1))
+        if after is not None:
+            contributions.extend(_payment_increments(after, 1))
+    return contributions
+
+
+def record_payment(database, before: Optional[dict], after: Optional[dict]):
+    """
+    Moves a payment's contribution to the rollups from its previous to its new state.
+
+    Parameters:
+        database (Database): The database holding the rollup collections.
+        before (dict): The payment document before the write, or None for an insert.
+        after (dict): The payment document after the write, or None for a delete.
+    """
+    _apply(database, _payment_changes([(before, after)]))
+
+
+def record_payments(database, changes):
+    """record_payment for many (before, after) pairs, with one write per rollup document."""
+    _apply(database, _payment_changes(changes))
+
+
+async def async_record_payment(database, before: Optional[dict], after: Optional[dict]):
+    """record_payment for a Motor database."""
+    await _async_apply(database, _payment_changes([(before, after)]))
+
+
+def record_bid(database, freelancer_id: ObjectId, bid_amount: float):
+    _apply(database, [(FreelancerStats.collection_name, freelancer_id, {"bids": 1, "bidAmount": bid_amount})])
+
+
+def record_project(database, project: dict):
+    """
+    Adds the bids and freelancer review of a newly inserted project document, with one write per freelancer.
+
+    For projects inserted whole, e.g. by fake_data, instead of through add_bid and add_review.
+    """
+    contributions = [
+        (FreelancerStats.collection_name, bid["freelancerId"], {"bids": 1, "bidAmount": bid.get("bidAmount") or 0})
+        for bid in project.get("bids") or [] if bid.get("freelancerId") is not None
+    ]
+    review = (project.get("reviews") or {}).get("freelancerReview")
+    if project.get("freelancerId") is not None and review and isinstance(review.get("rating"), (int, float)):
+        contributions.append((FreelancerStats.collection_name, project["freelancerId"],
+                              {"reviews": 1, "ratingSum": review["rating"]}))
+    _apply(database, contributions)
+
+
+def record_review(database, freelancer_id: ObjectId, rating: int, previous_rating: Optional[int] = None):
+    """Adds a freelancer review rating, replacing previous_rating when the review was rewritten."""
+    fields = {"reviews": 1, "ratingSum": rating}
+    if previous_rating is not None:
+        fields = {"reviews": 0, "ratingSum": rating - previous_rating}
+    _apply(database, [(FreelancerStats.collection_name, freelancer_id, fields)])
+
+
+def rebuild(database):
+    """
+    Recomputes every rollup collection from its sources, repairing any drift.
+
+    Payment writes (save_to_db, update_status, delete, save_many and the async
+    methods) and Project.add_bid/add_review keep the rollups current; run this after
+    writes that bypass them, such as Project.save_many, the async Project methods,
+    direct collection writes or fake_data's bulk, parallel and consistent seeding
+    (which call it themselves).
+    """
+    for rollup_class in ROLLUP_CLASSES:
+        try:
+            rollup_class.rebuild(database)
+            print(f"Rollup '{rollup_class.collection_name}' rebuilt.")
+        except Exception as e:
+            logging.error(f"Error rebuilding {rollup_class.collection_name}: {e}")
+            raise RuntimeError(f"Failed to rebuild rollups: {e}")
+
+
+if __name__ == "__main__":
+    import connection
+    rebuild(connection.get_database())
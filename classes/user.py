@@ -1,13 +1,48 @@
 from datetime import datetime
 from bson import ObjectId
+from pymongo import IndexModel
 from pymongo.collection import Collection
 from pymongo.errors import PyMongoError
 import logging
+from classes.base import BaseEntity
+from classes.cache import entity_cache
+from classes.codec import Field
 
 
-class User:
+class User(BaseEntity):
     """A class representing a user entity."""
 
+    __slots__ = (
+        "_id",
+        "name",
+        "email",
+        "password_hash",
+        "profile_picture",
+        "bio",
+        "created_at",
+        "updated_at",
+    )
+    fields = [
+        Field("_id"),
+        Field("name"),
+        Field("email"),
+        Field("password_hash", "passwordHash"),
+        Field("profile_picture", "profilePicture"),
+        Field("bio"),
+        Field("created_at", "createdAt"),
+        Field("updated_at", "updatedAt"),
+    ]
+    collection_name = "Users"
+    indexes = [
+        IndexModel([("email", 1)]),
+    ]
+    query_shapes = {
+        "_id (find_by_id)": {"_id": ObjectId()},
+        "email (find_by_email)": {"email": ""},
+    }
+    touch_field = "updated_at"
+    touch_on_save = True
+
     def __init__(
         self,
         _id: ObjectId = None,
@@ -28,35 +63,6 @@ class User:
         self.created_at = created_at or datetime.utcnow()
         self.updated_at = updated_at or datetime.utcnow()
 
-    def to_dict(self) -> dict:
-        """Converts the object to a dictionary for MongoDB storage."""
-        return {
-            "_id": self._id,
-            "name": self.name,
-            "email": self.email,
-            "passwordHash": self.password_hash,
-            "profilePicture": self.profile_picture,
-            "bio": self.bio,
-            "createdAt": self.created_at,
-            "updatedAt": self.updated_at,
-        }
-
-    @classmethod
-    def from_dict(cls, data: dict):
-        """Creates a User instance from a dictionary."""
-        if not data:
-            raise ValueError("Cannot create User from empty data.")
-        return cls(
-            _id=data["_id"],
-            name=data["name"],
-            email=data["email"],
-            password_hash=data["passwordHash"],
-            profile_picture=data["profilePicture"],
-            bio=data["bio"],
-            created_at=data["createdAt"],
-            updated_at=data["updatedAt"],
-        )
-
     def save_to_db(self, collection: Collection) -> ObjectId:
         """
         Saves the user object to the database.
@@ -68,10 +74,17 @@ class User:
             ObjectId: The ID of the saved user.
         """
         try:
+            if self._snapshot is not None and not self.dirty_fields():
+                logging.info(f"User {self.name} unchanged, nothing to save.")
+                return self._id
             self.updated_at = datetime.utcnow()  # Update timestamp
+            user_data = self.to_dict()
+            # Only never-loaded users are upserted whole; loaded ones send just their changes
             collection.update_one(
-                {"_id": self._id}, {"$set": self.to_dict()}, upsert=True
+                {"_id": self._id}, self._changes(user_data), upsert=self._snapshot is None
             )
+            self._mark_clean(user_data)
+            self._invalidate(collection)
             logging.info(f"User {self.name} saved/updated successfully.")
             return self._id
         except PyMongoError as e:
@@ -91,10 +104,10 @@ class User:
             User: The found user instance, or None if not found.
         """
         try:
-            data = collection.find_one({"_id": user_id})
-            if data:
+            user = cls._load(collection, user_id)
+            if user:
                 logging.info(f"User found with ID {user_id}.")
-                return cls.from_dict(data)
+                return user
             logging.warning(f"No user found with ID {user_id}.")
             return None
         except PyMongoError as e:
@@ -106,6 +119,10 @@ class User:
         """
         Finds a user by their email.
 
+        The email's _id is cached next to the user's document, so a repeated lookup
+        is served from the entity cache like find_by_id; an entry whose user has
+        since changed email or left the cache falls back to the query.
+
         Parameters:
             collection (Collection): The MongoDB collection.
             email (str): The user's email.
@@ -113,11 +130,19 @@ class User:
         Returns:
             User: The found user instance, or None if not found.
         """
+        email_key = (collection.full_name, ("email", email))
         try:
+            cached = entity_cache.get(email_key)
+            if cached is not None:
+                user = cls._load_cached(collection, cached["_id"])
+                if user is not None and user.email == email:
+                    return user
             data = collection.find_one({"email": email})
             if data:
                 logging.info(f"User found with email {email}.")
-                return cls.from_dict(data)
+                entity_cache.put((collection.full_name, data["_id"]), data)
+                entity_cache.put(email_key, {"_id": data["_id"]})
+                return cls._from_document(collection, data)
             logging.warning(f"No user found with email {email}.")
             return None
         except PyMongoError as e:
@@ -136,6 +161,7 @@ class User:
         """
         try:
             result = collection.delete_one({"_id": self._id})
+            self._invalidate(collection, deleted=True)
             if result.deleted_count > 0:
                 logging.info(f"User {self.name} deleted successfully.")
                 return True
@@ -0,0 +1,143 @@
+from functools import lru_cache
+from pymongo import MongoClient, monitoring
+import asyncio
+import threading
+import weakref
+import os
+
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
+DATABASE_NAME = os.environ.get("MONGO_DATABASE", "FreelancerManagement")
+MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 50))
+MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts connection pool events so pool usage can be inspected at runtime."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "checkout_failures": 0,
+            "pools_cleared": 0,
+        }
+
+    def _increment(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+    def snapshot(self) -> dict:
+        """Returns the current counters plus the open and checked out connection totals."""
+        with self._lock:
+            counts = dict(self._counts)
+        counts["connections_open"] = counts["connections_created"] - counts["connections_closed"]
+        counts["connections_in_use"] = counts["checkouts"] - counts["checkins"]
+        return counts
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._increment("pools_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._increment("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._increment("connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._increment("checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._increment("checkouts")
+
+    def connection_checked_in(self, event):
+        self._increment("checkins")
+
+
+pool_metrics = PoolMetrics()
+
+
+@lru_cache(maxsize=None)
+def get_client(uri: str = MONGO_URI, max_pool_size: int = MAX_POOL_SIZE, min_pool_size: int = MIN_POOL_SIZE) -> MongoClient:
+    """
+    Returns the process-wide MongoClient for the given settings.
+
+    The client is created once and reused, so Streamlit reruns and repeated
+    calls from scripts share one connection pool instead of rediscovering the server.
+
+    Args:
+        uri (str): The MongoDB connection string.
+        max_pool_size (int): Maximum number of pooled connections per server.
+        min_pool_size (int): Number of connections kept open while idle.
+
+    Returns:
+        MongoClient: The shared client.
+    """
+    return MongoClient(
+        uri,
+        maxPoolSize=max_pool_size,
+        minPoolSize=min_pool_size,
+        event_listeners=[pool_metrics],
+    )
+
+
+def get_database(name: str = DATABASE_NAME):
+    """Returns the application database from the shared client."""
+    return get_client()[name]
+
+
+# Motor clients per event loop: a client is bound to the loop it is first used on
+_async_clients = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def get_async_client(uri: str = MONGO_URI, max_pool_size: int = MAX_POOL_SIZE, min_pool_size: int = MIN_POOL_SIZE):
+    """
+    Returns the Motor client of the running event loop for asyncio code, configured like get_client.
+
+    Motor binds a client to the event loop it is first used on, so one client is
+    kept per loop (and dropped with it): a later asyncio.run gets a new client
+    instead of one tied to a closed loop. Must be called from inside a running loop.
+    Motor is only imported here, so the synchronous modules do not depend on it.
+    """
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    loop = asyncio.get_running_loop()
+    key = (uri, max_pool_size, min_pool_size)
+    with _async_clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        if key not in clients:
+            clients[key] = AsyncIOMotorClient(
+                uri,
+                maxPoolSize=max_pool_size,
+                minPoolSize=min_pool_size,
+                event_listeners=[pool_metrics],
+            )
+        return clients[key]
+
+
+def get_async_database(name: str = DATABASE_NAME):
+    """Returns the application database from the running event loop's Motor client."""
+    return get_async_client()[name]
+
+
+def get_pool_metrics() -> dict:
+    """Returns connection pool counters for every client created by get_client."""
+    return pool_metrics.snapshot()
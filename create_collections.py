@@ -1,8 +1,10 @@
-from pymongo import MongoClient
+import connection
+import indexes
+from classes.cache import query_cache
+
 def create_databases():
 
-    client = MongoClient("mongodb://localhost:27017/")
-    db = client["FreelancerManagement"]
+    db = connection.get_database()
 
     collections = [
         "Users",
@@ -10,10 +12,14 @@ def create_databases():
         "Clients",
         "Admins",
         "Messages",
+        "MessageBuckets",
         "Notifications",
         "Projects",
         "Payments",
-        "Categories"
+        "Categories",
+        "FreelancerStats",
+        "ClientSpend",
+        "DailyPayments"
     ]
     
     for collection in collections:
@@ -23,10 +29,9 @@ def create_databases():
         else:
             print(f"Collection '{collection}' already exists.")
 
-    db.Freelancers.create_index([("email", 1)], unique=True)
-    db.Clients.create_index([("email", 1)], unique=True)
-    db.Projects.create_index([("clientId", 1), ("freelancerId", 1)])
-    db.Notifications.create_index([("userId", 1)])
+    # Indexes are declared on the entity classes; see indexes.py
+    indexes.sync_indexes(db, explain=False)
+    query_cache.clear()
 
     print("Collections and indexes created successfully.")
 
@@ -1,19 +1,24 @@
-from pymongo import MongoClient
+import connection
+from classes.cache import entity_cache, query_cache
 
 def delete_databases():
     try:
-        client = MongoClient("mongodb://localhost:27017/")
-        db = client["FreelancerManagement"]
+        client = connection.get_client()
+        db = connection.get_database()
         collections_to_drop = [
             "Users",
             "Freelancers",
             "Clients",
             "Admins",
             "Messages",
+            "MessageBuckets",
             "Notifications",
             "Projects",
             "Payments",
-            "Categories"
+            "Categories",
+            "FreelancerStats",
+            "ClientSpend",
+            "DailyPayments"
         ]
         if db.name in client.list_database_names():
             print(f"Database '{db.name}' found. Proceeding to drop collections.")
@@ -21,6 +26,8 @@ def delete_databases():
                 if collection_name in db.list_collection_names():
                     try:
                         db.drop_collection(collection_name)
+                        entity_cache.invalidate_collection(f"{db.name}.{collection_name}")
+                        query_cache.invalidate_collection(f"{db.name}.{collection_name}")
                         print(f"Collection '{collection_name}' dropped successfully!")
                     except Exception as e:
                         print(f"Error dropping collection '{collection_name}': {e}")
@@ -0,0 +1,320 @@
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+import bson
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+import connection
+
+FORMATS = {"parquet": "parquet", "csv": "csv", "ndjson": "ndjson"}
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+# Embedded arrays of documents written as child tables, one row per item, instead of a column
+CHILD_TABLES = {
+    "Projects": ["bids"],
+    "Freelancers": ["reviews", "services", "portfolio"],
+    "Messages": ["messages"],
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _text(value):
+    """The text of a value in a string column: strings as they are, lists and documents as JSON."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_json_default)
+    return _json_default(value)
+
+
+def _normalize(df):
+    """
+    Converts ObjectId columns to strings, datetimes to UTC timestamps and remaining lists or documents to JSON.
+
+    A datetime column with values of other types is left as it is; _TableWriter
+    then writes it as a string column.
+    """
+    for column in df.columns:
+        values = df[column].dropna()
+        if values.empty:
+            continue
+        first = values.iloc[0]
+        if isinstance(first, ObjectId):
+            df[column] = df[column].map(str, na_action="ignore")
+        elif isinstance(first, datetime):
+            if all(isinstance(value, datetime) for value in values):
+                df[column] = pd.to_datetime(df[column], utc=True)
+        elif isinstance(first, (list, dict)):
+            df[column] = df[column].map(lambda value: json.dumps(value, default=_json_default), na_action="ignore")
+    return df
+
+
+def _child_rows(documents, field, parent_key):
+    """Takes field out of each document and returns its items as rows referencing the parent _id."""
+    rows = []
+    for document in documents:
+        items = document.pop(field, None)
+        if not isinstance(items, list):
+            continue
+        for position, item in enumerate(items):
+            row = dict(item) if isinstance(item, dict) else {"value": item}
+            row[parent_key] = document.get("_id")
+            row["position"] = position
+            rows.append(row)
+    return rows
+
+
+def _batch_schema(df):
+    """Infers the Arrow type of each column of a batch; all-null columns are null-typed and mixed ones strings."""
+    fields = []
+    for column in df.columns:
+        values = df[column]
+        present = values.dropna()
+        # pandas turns an int column with missing values into floats; keep it an int column
+        if pd.api.types.is_float_dtype(values) and len(present) < len(values) and (present % 1 == 0).all():
+            fields.append(pa.field(column, pa.int64() if len(present) else pa.null()))
+            continue
+        try:
+            arrow_type = pa.array(values, from_pandas=True).type
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields)
+
+
+def _part_path(path, part):
+    """The path of a table's part file: path itself for the first part, e.g. Projects.part2.parquet after it."""
+    if part == 1:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.part{part}{extension}"
+
+
+class _TableWriter:
+    """
+    Writes one Parquet or CSV table batch by batch, in a fixed schema per part file.
+
+    The first non-empty batch decides the schema; columns that are only null in it
+    are written as strings until they get values. A later batch that does not fit,
+    because it has new columns, values for such a column, or values of another type,
+    starts a new part file (see _part_path) whose schema is widened to hold it:
+    ints and floats become floats and other conflicting types strings, which hold
+    every value as text (see _text). No value is dropped or nulled.
+    """
+
+    def __init__(self, path, file_format):
+        self.path = path
+        self.file_format = file_format
+        self.schema = None
+        # Rows written per part file
+        self.files = {}
+        self._writer = None
+        # Columns of the current schema typed as strings only because they were all null
+        self._untyped = set()
+
+    def _fits(self, batch_schema):
+        for field in batch_schema:
+            if pa.types.is_null(field.type):
+                continue
+            if field.name not in self.schema.names or field.name in self._untyped:
+                return False
+            current = self.schema.field(field.name).type
+            if not (current == field.type or pa.types.is_string(current)
+                    or (pa.types.is_floating(current) and pa.types.is_integer(field.type))):
+                return False
+        return True
+
+    def _widen(self, batch_schema):
+        """Returns the current schema extended and retyped to hold the batch, updating _untyped."""
+        fields = {field.name: field.type for field in self.schema} if self.schema is not None else {}
+        for field in batch_schema:
+            if pa.types.is_null(field.type):
+                if field.name not in fields:
+                    fields[field.name] = pa.string()
+                    self._untyped.add(field.name)
+                continue
+            current = fields.get(field.name)
+            if current is None or field.name in self._untyped:
+                fields[field.name] = field.type
+                self._untyped.discard(field.name)
+            elif current != field.type and not pa.types.is_string(current):
+                numeric = all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (current, field.type))
+                fields[field.name] = pa.float64() if numeric else pa.string()
+        return pa.schema([pa.field(name, arrow_type) for name, arrow_type in fields.items()])
+
+    def _start_part(self, schema):
+        self.close()
+        self._writer = None
+        self.schema = schema
+        path = _part_path(self.path, len(self.files) + 1)
+        if self.files:
+            logging.info(f"{self.path}: the schema changed, continuing in {path}.")
+        self.files[path] = 0
+        if self.file_format == "parquet":
+            self._writer = pq.ParquetWriter(path, schema)
+        else:
+            self._writer = pa_csv.CSVWriter(path, schema)
+
+    def _record_batch(self, df):
+        arrays = []
+        for field in self.schema:
+            values = df[field.name] if field.name in df.columns else pd.Series([None] * len(df), dtype=object)
+            if pa.types.is_string(field.type):
+                values = values.map(_text, na_action="ignore")
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def write(self, rows):
+        if not rows:
+            return
+        df = _normalize(pd.json_normalize(rows))
+        batch_schema = _batch_schema(df)
+        if self.schema is None or not self._fits(batch_schema):
+            self._start_part(self._widen(batch_schema))
+        self._writer.write_batch(self._record_batch(df))
+        self.files[_part_path(self.path, len(self.files))] += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class _NdjsonWriter:
+    """Writes rows as they were decoded, one JSON object per line, so no schema is needed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self._file = None
+
+    def write(self, rows):
+        if not rows:
+            return
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self.files[self.path] = 0
+        for row in rows:
+            self._file.write(json.dumps(row, default=_json_default) + "\n")
+        self.files[self.path] += len(rows)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _writer(path, file_format):
+    return _NdjsonWriter(path) if file_format == "ndjson" else _TableWriter(path, file_format)
+
+
+def export_collection(db, collection_name, output_dir, file_format="parquet", batch_size=10000,
+                      filter=None, child_tables=True, on_batch=None):
+    """
+    Streams a collection into Parquet, CSV or NDJSON files with bounded memory.
+
+    The cursor is read batch_size raw documents at a time and each batch is decoded
+    with one decode_all, so memory is bounded by one batch whatever the size of the
+    collection. NDJSON lines are the decoded documents themselves. For Parquet and
+    CSV each batch is flattened (embedded documents become dotted columns) and
+    appended as an Arrow record batch; a batch that does not fit the schema so far
+    continues the table in a new part file (see _TableWriter). With child_tables,
+    the arrays listed in CHILD_TABLES go to their own files, e.g. Projects.bids.parquet
+    with a projectId column and the item's position.
+
+    Args:
+        db: The MongoDB database object.
+        collection_name (str): The collection to export.
+        output_dir (str): Directory receiving <collection>.<ext> and <collection>.<field>.<ext>.
+        file_format (str): "parquet", "csv" or "ndjson".
+        batch_size (int): Documents per cursor batch and per record batch.
+        filter (dict): Query selecting the documents to export; all when omitted.
+        child_tables (bool): Whether to split CHILD_TABLES arrays into child tables.
+        on_batch (callable): Called with the number of documents exported so far after each batch.
+
+    Returns:
+        dict: Rows written per file (part files included), elapsed seconds and documents per second.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"file_format must be one of {sorted(FORMATS)}.")
+    os.makedirs(output_dir, exist_ok=True)
+    extension = FORMATS[file_format]
+    children = CHILD_TABLES.get(collection_name, []) if child_tables else []
+    # e.g. projectId for the rows of Projects.bids
+    parent_key = f"{collection_name[0].lower()}{collection_name[1:].removesuffix('s')}Id"
+
+    writers = {None: _writer(os.path.join(output_dir, f"{collection_name}.{extension}"), file_format)}
+    for field in children:
+        writers[field] = _writer(os.path.join(output_dir, f"{collection_name}.{field}.{extension}"), file_format)
+
+    collection = db[collection_name].with_options(codec_options=RAW_CODEC_OPTIONS)
+    documents_done = 0
+    start = time.perf_counter()
+
+    def flush(batch):
+        documents = bson.decode_all(b"".join(document.raw for document in batch))
+        for field in children:
+            writers[field].write(_child_rows(documents, field, parent_key))
+        writers[None].write(documents)
+
+    try:
+        batch = []
+        with collection.find(filter or {}, batch_size=batch_size) as cursor:
+            for document in cursor:
+                batch.append(document)
+                if len(batch) == batch_size:
+                    flush(batch)
+                    documents_done += len(batch)
+                    batch = []
+                    if on_batch is not None:
+                        on_batch(documents_done)
+            if batch:
+                flush(batch)
+                documents_done += len(batch)
+                if on_batch is not None:
+                    on_batch(documents_done)
+    except Exception as e:
+        logging.error(f"Error exporting {collection_name}: {e}")
+        raise RuntimeError(f"Failed to export {collection_name}: {e}")
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    rate = documents_done / elapsed if elapsed > 0 else 0.0
+    logging.info(f"Exported {documents_done} {collection_name} documents in {elapsed:.2f}s ({rate:.0f} docs/s).")
+    stats = {
+        os.path.basename(path): rows
+        for writer in writers.values() for path, rows in writer.files.items() if rows
+    }
+    stats["seconds"] = elapsed
+    stats["docs_per_second"] = rate
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export FreelancerManagement collections to Parquet, CSV or NDJSON.")
+    parser.add_argument("collections", nargs="+", help="collections to export")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--out", default="exports", help="output directory")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--no-child-tables", action="store_true", help="keep embedded arrays as JSON columns")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = connection.get_database()
+    for name in args.collections:
+        stats = export_collection(db, name, args.out, args.format, args.batch_size,
+                                  child_tables=not args.no_child_tables)
+        print(f"{name}: {stats}")
@@ -1,9 +1,17 @@
-from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 from bson import ObjectId
 from faker import Faker
 import random
+import time
+import os
+import argparse
+import multiprocessing
+from itertools import islice
+from array import array
+from bisect import bisect
 from datetime import datetime, timezone
 import logging
+import connection
 from classes.admin import Admin
 from classes.user import User
 from classes.freelancer import Freelancer
@@ -13,13 +21,61 @@ from classes.project import Project, Bid, Review, Status
 from classes.notification import Notification
 from classes.category import Category
 from classes.message import Message
+from classes import rollups
+from classes.cache import query_cache
 
 fake = Faker()
 
-def generate_user_data(num_entries):
-    users = []
+class IdPool:
+    """
+    Compact store of the ids of already-seeded documents, sampled with a Zipf skew.
+
+    Each row holds one or more ObjectIds packed into a bytearray (12 bytes per id).
+    Row k (1-based) is drawn with probability proportional to 1 / k**skew, so skew=0
+    is uniform and larger values concentrate references on the earliest rows.
+    """
+
+    def __init__(self, skew=1.0, width=1):
+        self.skew = skew
+        self.width = width
+        self._ids = bytearray()
+        self._cumulative = None
+
+    def __len__(self):
+        return len(self._ids) // (12 * self.width)
+
+    def add(self, *ids):
+        if len(ids) != self.width:
+            raise ValueError(f"Expected {self.width} ids per row, got {len(ids)}.")
+        for _id in ids:
+            self._ids += _id.binary
+        self._cumulative = None
+
+    def row(self, index):
+        start = index * 12 * self.width
+        return tuple(ObjectId(bytes(self._ids[offset:offset + 12])) for offset in range(start, start + 12 * self.width, 12))
+
+    def sample_row(self):
+        if not len(self):
+            raise ValueError("Cannot sample from an empty IdPool.")
+        if self._cumulative is None:
+            total = 0.0
+            self._cumulative = array('d')
+            for rank in range(1, len(self) + 1):
+                total += rank ** -self.skew
+                self._cumulative.append(total)
+        return self.row(bisect(self._cumulative, random.random() * self._cumulative[-1]))
+
+    def sample(self):
+        return self.sample_row()[0]
+
+def _ref(pool):
+    """Samples a referenced id from pool, or returns a dangling ObjectId when no pool is given."""
+    return pool.sample() if pool is not None else ObjectId()
+
+def iter_user_data(num_entries):
     for _ in range(num_entries):
-        user = User(
+        yield User(
             name=fake.name(),
             email=fake.email(),
             password_hash=fake.password(),
@@ -28,14 +84,14 @@ def generate_user_data(num_entries):
             created_at=datetime.now(timezone.utc),
             updated_at=datetime.now(timezone.utc)
         )
-        users.append(user)
-    return users
 
-def generate_freelancer_data(num_entries):
-    freelancers = []
+def generate_user_data(num_entries):
+    return list(iter_user_data(num_entries))
+
+def iter_freelancer_data(num_entries, users=None):
     for _ in range(num_entries):
-        freelancer = Freelancer(
-            user=ObjectId(),
+        yield Freelancer(
+            user=_ref(users),
             email=fake.email(),
             skills=[fake.word() for _ in range(random.randint(3, 7))],
             services=[{"service": fake.bs()} for _ in range(random.randint(1, 3))],
@@ -45,178 +101,374 @@ def generate_freelancer_data(num_entries):
             createdAt=datetime.now(timezone.utc),
             updatedAt=datetime.now(timezone.utc)
         )
-        freelancers.append(freelancer)
-    return freelancers
 
-def generate_client_data(num_entries):
-    clients = []
+def generate_freelancer_data(num_entries):
+    return list(iter_freelancer_data(num_entries))
+
+def iter_client_data(num_entries, users=None, freelancers=None):
     for _ in range(num_entries):
-        client = Client(
-            user=ObjectId(),
+        yield Client(
+            user=_ref(users),
             email=fake.email(),
-            hiredFreelancers=[ObjectId() for _ in range(random.randint(1, 5))],
-            reviewsGiven=[{"freelancer": ObjectId(), "rating": random.randint(1, 5), "review": fake.sentence()} for _ in range(random.randint(1, 5))],
+            hiredFreelancers=[_ref(freelancers) for _ in range(random.randint(1, 5))],
+            reviewsGiven=[{"freelancer": _ref(freelancers), "rating": random.randint(1, 5), "review": fake.sentence()} for _ in range(random.randint(1, 5))],
             createdAt=datetime.now(timezone.utc),
             updatedAt=datetime.now(timezone.utc)
         )
-        clients.append(client)
-    return clients
 
-def generate_admin_data(num_entries):
-    admins = []
+def generate_client_data(num_entries):
+    return list(iter_client_data(num_entries))
+
+def iter_admin_data(num_entries, users=None):
     for _ in range(num_entries):
-        admin = Admin(
-            user=ObjectId(),
+        yield Admin(
+            user=_ref(users),
             role=random.choice(["Super Admin", "Admin", "Moderator"]),
             createdAt=datetime.now(timezone.utc),
             updatedAt=datetime.now(timezone.utc)
         )
-        admins.append(admin)
-    return admins
 
-def generate_message_data(num_entries):
-    messages = []
+def generate_admin_data(num_entries):
+    return list(iter_admin_data(num_entries))
+
+def iter_message_data(num_entries, users=None):
     for _ in range(num_entries):
-        message = Message(
-            conversationId="some_conversation_id",
-            participants=[ObjectId(), ObjectId()],
-            messages=[{"senderId": ObjectId(), "content": "Hello, this is a message!"}],
+        if users is None:
+            yield Message(
+                conversationId="some_conversation_id",
+                participants=[ObjectId(), ObjectId()],
+                messages=[{"senderId": ObjectId(), "content": "Hello, this is a message!"}],
+                lastUpdated=datetime.now(timezone.utc)
+            )
+            continue
+        participants = [users.sample(), users.sample()]
+        yield Message(
+            conversationId="_".join(sorted(str(participant) for participant in participants)),
+            participants=participants,
+            messages=[{"senderId": random.choice(participants), "content": "Hello, this is a message!"}],
             lastUpdated=datetime.now(timezone.utc)
         )
-        messages.append(message)
-    return messages
 
-def generate_notification_data(num_entries):
-    notifications = []
+def generate_message_data(num_entries):
+    return list(iter_message_data(num_entries))
+
+def iter_notification_data(num_entries, users=None):
     for _ in range(num_entries):
-        notification = Notification(
-            userId=ObjectId(),
+        yield Notification(
+            userId=_ref(users),
             type="Info",
             content="This is a notification.",
             link=None,
             read=False,
             timestamp=datetime.now(timezone.utc)
         )
-        notifications.append(notification)
-    return notifications
 
-def generate_bid_data(num_entries):
-    bids = []
+def generate_notification_data(num_entries):
+    return list(iter_notification_data(num_entries))
+
+def iter_bid_data(num_entries, freelancers=None):
     for _ in range(num_entries):
-        bid = Bid(
-            freelancerId=ObjectId(),
+        yield Bid(
+            freelancerId=_ref(freelancers),
             bidAmount=100.0,
             message="This is a bid message.",
             date=datetime.now(timezone.utc)
         )
-        bids.append(bid)
-    return bids
 
-def generate_review_data(num_entries):
-    reviews = []
+def generate_bid_data(num_entries, freelancers=None):
+    return list(iter_bid_data(num_entries, freelancers))
+
+def iter_review_data(num_entries):
     for _ in range(num_entries):
         review = Review(
             rating=random.randint(1, 5),
             comment=fake.sentence(),
             date=datetime.now(timezone.utc)
         )
-        reviews.append(review.to_dict())
-    return reviews
+        yield review.to_dict()
 
-def generate_status_data(num_entries):
-    statuses = []
+def generate_review_data(num_entries):
+    return list(iter_review_data(num_entries))
+
+def iter_status_data(num_entries):
     for _ in range(num_entries):
-        status = Status(
+        yield Status(
             type="Active",
             lastUpdated=datetime.now(timezone.utc)
         )
-        statuses.append(status)
-    return statuses
 
-def generate_project_data(num_entries):
-    projects = []
+def generate_status_data(num_entries):
+    return list(iter_status_data(num_entries))
+
+def iter_project_data(num_entries, clients=None, freelancers=None):
     for _ in range(num_entries):
-        project = Project(
+        yield Project(
             title=fake.bs(),
             description=fake.text(),
-            clientId=ObjectId(),
-            freelancerId=ObjectId(),
+            clientId=_ref(clients),
+            freelancerId=_ref(freelancers),
             budget=random.uniform(500, 5000),
-            bids=generate_bid_data(random.randint(1, 5)),
+            bids=generate_bid_data(random.randint(1, 5), freelancers),
             status=random.choice(generate_status_data(1)),
-            reviews=[review for review in generate_review_data(1)],
+            reviews={"clientReview": next(iter_review_data(1)), "freelancerReview": None},
             createdAt=datetime.now(timezone.utc),
             updatedAt=datetime.now(timezone.utc)
         )
-        projects.append(project)
-    return projects
 
-def generate_payment_data(num_entries):
-    payments = []
+def generate_project_data(num_entries):
+    return list(iter_project_data(num_entries))
+
+def iter_payment_data(num_entries, projects=None):
     for _ in range(num_entries):
-        payment = Payment(
-            projectId=ObjectId(),
-            clientId=ObjectId(),
-            freelancerId=ObjectId(),
+        # projects rows are (projectId, clientId, freelancerId), so a payment matches its project
+        projectId, clientId, freelancerId = projects.sample_row() if projects is not None else (ObjectId(), ObjectId(), ObjectId())
+        yield Payment(
+            projectId=projectId,
+            clientId=clientId,
+            freelancerId=freelancerId,
             amount=random.uniform(50, 2000),
             paymentStatus=random.choice(['Pending', 'Completed', 'Failed']),
             timestamp=datetime.now(timezone.utc)
         )
-        payments.append(payment)
-    return payments
 
-def generate_category_data(num_entries):
-    categories = []
+def generate_payment_data(num_entries):
+    return list(iter_payment_data(num_entries))
+
+def iter_category_data(num_entries):
     for _ in range(num_entries):
-        category = Category(
+        yield Category(
             name=fake.bs(),
             createdAt=datetime.now(timezone.utc),
             updatedAt=datetime.now(timezone.utc)
         )
-        categories.append(category)
-    return categories
-
-def main(n : int):
-    client = MongoClient("mongodb://localhost:27017/")
-    db = client['FreelancerManagement']
-
-    users = generate_user_data(n)
-    freelancers = generate_freelancer_data(n)
-    clients = generate_client_data(n)
-    admins = generate_admin_data(n)
-    messages = generate_message_data(n)
-    notifications = generate_notification_data(n)
-    bids = generate_bid_data(n)
-    reviews = generate_review_data(n)
-    statuses = generate_status_data(n)
-    projects = generate_project_data(n)
-    payments = generate_payment_data(n)
-    categories = generate_category_data(n)
+
+def generate_category_data(num_entries):
+    return list(iter_category_data(num_entries))
+
+def insert_in_batches(collection, objects, batch_size=1000):
+    """
+    Inserts entity objects with unordered insert_many calls of at most batch_size documents.
+
+    Each object's _id is back-filled from the insert result. Documents rejected by the
+    server (e.g. duplicate keys) are logged and keep their previous _id.
+
+    Returns:
+        int: The number of documents inserted.
+    """
+    inserted = 0
+    for start in range(0, len(objects), batch_size):
+        batch = objects[start:start + batch_size]
+        documents = [obj.to_dict() for obj in batch]
+        try:
+            result = collection.insert_many(documents, ordered=False)
+            for obj, inserted_id in zip(batch, result.inserted_ids):
+                obj._id = inserted_id
+            inserted += len(result.inserted_ids)
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            for index, (obj, document) in enumerate(zip(batch, documents)):
+                if index not in failed:
+                    obj._id = document["_id"]
+            inserted += e.details.get("nInserted", len(batch) - len(failed))
+            logging.error(f"{len(failed)} documents rejected while inserting into {collection.name}.")
+    return inserted
+
+def insert_stream(collection, objects, batch_size=1000, on_batch=None):
+    """
+    Inserts an iterable of entity objects as it is produced, one batch at a time.
+
+    At most batch_size objects are held in memory, so generators of any length
+    can be written in constant memory. on_batch, if given, is called with each
+    batch once its _ids have been back-filled.
+
+    Returns:
+        int: The number of documents inserted.
+    """
+    objects = iter(objects)
+    inserted = 0
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return inserted
+        inserted += insert_in_batches(collection, batch, batch_size)
+        if on_batch is not None:
+            on_batch(batch)
+
+def save_in_bulk(db, entities, batch_size=1000, on_batch=None):
+    """
+    Persists every stream of entities into its collection and reports the throughput.
+
+    Args:
+        db: The MongoDB database object.
+        entities (dict): Maps collection names to iterables of entity objects.
+        batch_size (int): Maximum number of documents per insert_many call.
+        on_batch (dict): Optional per-collection callbacks passed to insert_stream.
+
+    Returns:
+        dict: Per-collection inserted count, elapsed seconds and documents per second.
+    """
+    on_batch = on_batch or {}
+    stats = {}
+    for collection_name, objects in entities.items():
+        start = time.perf_counter()
+        inserted = insert_stream(db[collection_name], objects, batch_size, on_batch.get(collection_name))
+        elapsed = time.perf_counter() - start
+        rate = inserted / elapsed if elapsed > 0 else 0.0
+        logging.info(f"{collection_name}: inserted {inserted} documents in {elapsed:.2f}s ({rate:.0f} docs/s).")
+        stats[collection_name] = {"inserted": inserted, "seconds": elapsed, "docs_per_second": rate}
+    return stats
+
+GENERATORS = {
+    'Users': iter_user_data,
+    'Freelancers': iter_freelancer_data,
+    'Clients': iter_client_data,
+    'Admins': iter_admin_data,
+    'Messages': iter_message_data,
+    'Notifications': iter_notification_data,
+    'Projects': iter_project_data,
+    'Payments': iter_payment_data,
+    'Categories': iter_category_data,
+}
+
+def _seed_worker(args):
+    """Generates one shard of every collection and inserts it batch by batch."""
+    worker_index, count, batch_size, seed = args
+    Faker.seed(seed + worker_index)
+    random.seed(seed + worker_index)
+    db = connection.get_database()
+
+    return {
+        collection_name: insert_stream(db[collection_name], generate(count), batch_size)
+        for collection_name, generate in GENERATORS.items()
+    }
+
+def main_parallel(n : int, workers : int = None, batch_size : int = 1000, seed : int = 0):
+    """
+    Generates n records per collection across a pool of worker processes.
+
+    n is split evenly between the workers. Each worker seeds Faker and random with
+    seed + its index, so a run is reproducible for a given (n, workers, seed), and
+    inserts its own batches as soon as they are generated.
+
+    Returns:
+        dict: Per-collection inserted count, plus total elapsed seconds and documents per second.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, n))
+    shares = [n // workers + (1 if index < n % workers else 0) for index in range(workers)]
+
+    start = time.perf_counter()
+    # spawn rather than fork: a forked child must not inherit the parent's MongoClient
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        results = pool.map(_seed_worker, [(index, share, batch_size, seed) for index, share in enumerate(shares)])
+    elapsed = time.perf_counter() - start
+    # Bulk inserts bypass the incremental rollup updates
+    rollups.rebuild(connection.get_database())
+    query_cache.clear()
+
+    stats = {collection_name: sum(result[collection_name] for result in results) for collection_name in GENERATORS}
+    total = sum(stats.values())
+    rate = total / elapsed if elapsed > 0 else 0.0
+    logging.info(f"{workers} workers inserted {total} documents in {elapsed:.2f}s ({rate:.0f} docs/s).")
+    stats["seconds"] = elapsed
+    stats["docs_per_second"] = rate
+    return stats
+
+def _collect(pool, *attributes):
+    """Returns an on_batch callback that adds each inserted object's ids to pool."""
+    def on_batch(batch):
+        for obj in batch:
+            if obj._id is not None:
+                pool.add(*(getattr(obj, attribute) for attribute in attributes))
+    return on_batch
+
+def main_consistent(n : int, batch_size : int = 1000, skew : float = 1.0, skews : dict = None):
+    """
+    Generates n records per collection whose references all point at seeded documents.
+
+    Users are written first and every later collection samples real ids from the
+    collections written before it, through IdPools with a Zipf skew (default skew,
+    overridable per referenced collection in skews), so a few hot users, freelancers,
+    clients and projects receive most of the references. Payments reuse the client
+    and freelancer of the project they pay for.
+
+    Returns:
+        dict: Per-collection inserted count, elapsed seconds and documents per second.
+    """
+    skews = skews or {}
+    users = IdPool(skews.get('Users', skew))
+    freelancers = IdPool(skews.get('Freelancers', skew))
+    clients = IdPool(skews.get('Clients', skew))
+    projects = IdPool(skews.get('Projects', skew), width=3)
+
+    # Generators are lazy, so each one only samples its pools once earlier collections are written
+    entities = {
+        'Users': iter_user_data(n),
+        'Freelancers': iter_freelancer_data(n, users),
+        'Clients': iter_client_data(n, users, freelancers),
+        'Admins': iter_admin_data(n, users),
+        'Projects': iter_project_data(n, clients, freelancers),
+        'Payments': iter_payment_data(n, projects),
+        'Notifications': iter_notification_data(n, users),
+        'Messages': iter_message_data(n, users),
+        'Categories': iter_category_data(n),
+    }
+    on_batch = {
+        'Users': _collect(users, '_id'),
+        'Freelancers': _collect(freelancers, '_id'),
+        'Clients': _collect(clients, '_id'),
+        'Projects': _collect(projects, '_id', 'clientId', 'freelancerId'),
+    }
+    db = connection.get_database()
+    stats = save_in_bulk(db, entities, batch_size, on_batch)
+    rollups.rebuild(db)
+    query_cache.clear()
+    logging.info(f"Successfully generated a consistent graph of {n} records per collection.")
+    return stats
+
+def main(n : int, bulk : bool = False, batch_size : int = 1000):
+    db = connection.get_database()
+
+    # Lazy generators: entities are only created as each batch is written, never all at once
+    entities = {collection_name: generate(n) for collection_name, generate in GENERATORS.items()}
 
     try:
-        for user in users:
-            user.save_to_db(db['Users'])
-        for freelancer in freelancers:
-            freelancer.save_to_db(db['Freelancers'])
-        for client in clients:
-            client.save_to_db(db['Clients'])
-        for admin in admins:
-            admin.save_to_db(db['Admins'])
-        for message in messages:
-            message.save_to_db(db['Messages'])
-        for notification in notifications:
-            notification.save_to_db(db['Notifications'])
-        for project in projects:
-            project.save_to_db(db['Projects'])
-        for payment in payments:
-            payment.save_to_db(db['Payments'])
-        for category in categories:
-            category.save_to_db(db['Categories'])
+        if bulk:
+            stats = save_in_bulk(db, entities, batch_size)
+            rollups.rebuild(db)
+            logging.info(f"Successfully generated {n} records for each collection.")
+            return stats
+
+        for collection_name, objects in entities.items():
+            for obj in objects:
+                obj.save_to_db(db[collection_name])
+                # Payments update the rollups as they are saved; projects are saved
+                # whole rather than through add_bid, so their bids are recorded here
+                if collection_name == 'Projects':
+                    rollups.record_project(db, obj.to_dict())
 
         logging.info(f"Successfully generated {n} records for each collection.")
 
     except Exception as e:
         logging.error(f"Error while saving data to the database: {e}")
+    finally:
+        # Even a failed run may have written some documents
+        query_cache.clear()
 
 if __name__ == "__main__":
-    main(300)
+    parser = argparse.ArgumentParser(description="Seed the FreelancerManagement database with fake data.")
+    parser.add_argument("-n", type=int, default=300, help="records per collection")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--parallel", action="store_true", help="generate in a pool of worker processes")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="base Faker seed for parallel workers")
+    parser.add_argument("--consistent", action="store_true", help="reference real, previously seeded ids")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent for --consistent references (0 = uniform)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.consistent:
+        main_consistent(args.n, args.batch_size, args.skew)
+    elif args.parallel:
+        main_parallel(args.n, args.workers, args.batch_size, args.seed)
+    else:
+        main(args.n, bulk=True, batch_size=args.batch_size)
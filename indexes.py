@@ -0,0 +1,197 @@
+from pymongo import IndexModel
+import connection
+from classes.user import User
+from classes.freelancer import Freelancer
+from classes.client import Client
+from classes.admin import Admin
+from classes.message import Message
+from classes.message_bucket import MessageBucket
+from classes.notification import Notification
+from classes.project import Project
+from classes.payment import Payment
+from classes.category import Category
+from classes.rollups import FreelancerStats, ClientSpend, DailyPayments
+
+ENTITY_CLASSES = [User, Freelancer, Client, Admin, Message, MessageBucket, Notification, Project, Payment, Category,
+                  FreelancerStats, ClientSpend, DailyPayments]
+
+# Stages showing that a query was answered from an index rather than a collection scan
+INDEX_STAGES = {"IXSCAN", "IDHACK", "EXPRESS_IXSCAN", "EXPRESS_IDHACK", "COUNT_SCAN", "DISTINCT_SCAN"}
+
+
+def plan_stages(plan, key="stage"):
+    """
+    Collects every stage name in an explain() plan, whatever its nesting.
+
+    Args:
+        plan: A winning plan (or any part of an explain() result).
+        key (str): The plan attribute to collect instead, e.g. "indexName".
+
+    Returns:
+        list: The stage names, outermost first.
+    """
+    stages = []
+    if isinstance(plan, dict):
+        if key in plan:
+            stages.append(plan[key])
+        for value in plan.values():
+            stages.extend(plan_stages(value, key))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item, key))
+    return stages
+
+
+def explain_stages(collection, query):
+    """Returns the stage names of the winning plan for find(query) on collection."""
+    explanation = collection.find(query).explain()
+    return plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+
+
+def explain_query(collection, query, sort=None, limit=0):
+    """
+    Runs explain() on find(query) with the given sort and limit.
+
+    Returns:
+        dict: The winning plan's stages and the names of the indexes it uses, plus
+        executionTimeMillis, totalKeysExamined, totalDocsExamined and nReturned from
+        its execution statistics.
+    """
+    cursor = collection.find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    explanation = cursor.explain()
+    winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+    stats = explanation.get("executionStats", {})
+    result = {
+        "stages": plan_stages(winning_plan),
+        "indexes": sorted(set(plan_stages(winning_plan, "indexName"))),
+    }
+    for figure in ("executionTimeMillis", "totalKeysExamined", "totalDocsExamined", "nReturned"):
+        result[figure] = stats.get(figure)
+    return result
+
+
+def indexed_fields(index_information):
+    """
+    Returns the fields that lead an index in index_information(), so filters or sorts on them can use it.
+
+    Text indexes are left out: they only serve $text queries.
+    """
+    keys = [_key(info["key"], info.get("weights")) for info in index_information.values()]
+    return {key[0][0] for key in keys if key and key[0][1] != "text"}
+
+
+def _key(index_spec, weights=None):
+    """
+    Normalizes an index key (SON, dict or list of pairs) to a tuple of (field, direction).
+
+    The fields of a text index are listed in sorted order, where its first text field
+    was. index_information() reports a text index as _fts/_ftsx with its fields in
+    weights, so pass the weights of existing indexes.
+    """
+    items = index_spec.items() if hasattr(index_spec, "items") else index_spec
+    key, text_at, text_fields = [], None, list(weights or {})
+    for field, direction in items:
+        if field in ("_fts", "_ftsx") or direction == "text":
+            text_at = len(key) if text_at is None else text_at
+            if direction == "text" and field != "_fts":
+                text_fields.append(field)
+            continue
+        key.append((field, direction))
+    if text_at is not None:
+        key[text_at:text_at] = [(field, "text") for field in sorted(text_fields)]
+    return tuple(key)
+
+
+def find_redundant_indexes(index_information):
+    """
+    Finds indexes whose key is a prefix of another index's key.
+
+    Such an index can be served by the longer one and only costs writes, unless
+    it enforces uniqueness or other options the longer index lacks.
+
+    Args:
+        index_information (dict): The result of collection.index_information().
+
+    Returns:
+        list: (redundant index name, covering index name) pairs.
+    """
+    keys = {name: _key(info["key"], info.get("weights")) for name, info in index_information.items() if name != "_id_"}
+    redundant = []
+    for name, key in keys.items():
+        info = index_information[name]
+        if info.get("unique") or info.get("sparse") or "partialFilterExpression" in info:
+            continue
+        for other_name, other_key in keys.items():
+            if other_name != name and len(other_key) > len(key) and other_key[:len(key)] == key:
+                redundant.append((name, other_name))
+                break
+    return redundant
+
+
+def sync_indexes(db=None, entity_classes=ENTITY_CLASSES, explain=True):
+    """
+    Creates the indexes declared by each entity class that do not exist yet.
+
+    The sync is idempotent: an index is only created when no existing index has the
+    same key. Missing indexes are built in the background, redundant and undeclared
+    indexes are reported (never dropped), and each class's query_shapes are
+    explained to show whether they use an index.
+
+    Args:
+        db: The MongoDB database object; the shared connection is used when omitted.
+        entity_classes (list): The classes whose declarations are synced.
+        explain (bool): Whether to print explain() verification for the query shapes.
+
+    Returns:
+        dict: Per-collection lists of created, redundant and undeclared index names,
+        plus the plan stages of every query shape.
+    """
+    db = db if db is not None else connection.get_database()
+    report = {}
+    for entity_class in entity_classes:
+        collection = db[entity_class.collection_name]
+        existing = collection.index_information()
+        existing_keys = {_key(info["key"], info.get("weights")) for info in existing.values()}
+
+        missing = [
+            IndexModel(list(_key(index.document["key"])), background=True,
+                       **{option: value for option, value in index.document.items() if option != "key"})
+            for index in entity_class.indexes if _key(index.document["key"]) not in existing_keys
+        ]
+        created = collection.create_indexes(missing) if missing else []
+        for name in created:
+            print(f"Index '{name}' created on '{collection.name}'.")
+
+        declared_keys = {_key(index.document["key"]) for index in entity_class.indexes}
+        undeclared = [name for name, info in existing.items()
+                      if name != "_id_" and _key(info["key"], info.get("weights")) not in declared_keys]
+        for name in undeclared:
+            print(f"Index '{name}' on '{collection.name}' is not declared by {entity_class.__name__}.")
+
+        redundant = find_redundant_indexes(collection.index_information())
+        for name, covering in redundant:
+            print(f"Index '{name}' on '{collection.name}' is redundant with '{covering}'.")
+
+        plans = {}
+        if explain:
+            for shape, query in entity_class.query_shapes.items():
+                stages = explain_stages(collection, query)
+                plans[shape] = stages
+                verdict = "index" if INDEX_STAGES.intersection(stages) else "COLLECTION SCAN"
+                print(f"{entity_class.__name__} [{shape}]: {' <- '.join(stages)} ({verdict})")
+
+        report[collection.name] = {
+            "created": created,
+            "undeclared": undeclared,
+            "redundant": redundant,
+            "plans": plans,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    sync_indexes()
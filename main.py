@@ -1,13 +1,12 @@
 import streamlit as st
 import pandas as pd
-from pymongo import MongoClient
+import connection
 import streamlit_elements
 import fake_data
 from bson import ObjectId
 import json
-# MongoDB connection setup
-client = MongoClient('mongodb://localhost:27017/')
-db = client['FreelancerManagement']
+# MongoDB connection setup (shared, pooled client reused across reruns)
+db = connection.get_database()
 collections = ['Users', 'Freelancers', 'Clients', 'Messages', 'Projects', 'Payments', 'Categories']
 
 st.title('MongoDB Data Viewer')
@@ -28,6 +27,11 @@ with col1:
 with col2:
     streamlit_elements.show_deletion_expander()
 
+streamlit_elements.show_export_section(db, collections)
+
+with st.sidebar.expander("Connection pool"):
+    st.json(connection.get_pool_metrics())
+
 st.write('### MongoDB Records')
 # Use Streamlit to display the dataframe
 streamlit_elements.display_collection_selector(db, collections)
@@ -0,0 +1,9 @@
+import streamlit as st
+import connection
+import streamlit_elements
+
+db = connection.get_database()
+
+st.title('Analytics')
+
+streamlit_elements.show_analytics_dashboard(db)
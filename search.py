@@ -0,0 +1,139 @@
+from typing import Iterable, List, Optional, Tuple
+import logging
+from classes.freelancer import Freelancer
+from classes.project import Project
+
+# Fields returned with each hit; load the full entity with from_db when it is needed
+FREELANCER_FIELDS = ["user", "email", "skills", "services", "averageRating"]
+PROJECT_FIELDS = ["title", "clientId", "freelancerId", "budget", "status", "bidCount", "minBid"]
+
+
+def after_filter(sort, cursor):
+    """
+    Builds the filter selecting the rows that sort after the row whose sort values are cursor.
+
+    MongoDB sorts null and missing values before every other value, so they come
+    after any value in a descending sort and before it in an ascending one; a
+    None in cursor is matched (and compared) accordingly.
+    """
+    clauses = []
+    for index, (field, direction) in enumerate(sort):
+        # {field: None} matches both null and missing values
+        clause = {previous: value for (previous, _), value in zip(sort[:index], cursor)}
+        value = cursor[index]
+        if value is None:
+            if direction < 0:
+                # Nothing sorts after null in a descending sort
+                continue
+            clause[field] = {"$ne": None}
+        elif direction < 0:
+            clause["$or"] = [{field: {"$lt": value}}, {field: None}]
+        else:
+            clause[field] = {"$gt": value}
+        clauses.append(clause)
+    return {"$or": clauses} if clauses else {"_id": {"$exists": False}}
+
+
+def _search(collection, match, rank, sort, fields, after, limit):
+    """
+    Runs one page of a ranked search with keyset pagination.
+
+    The rank expression is stored as score and the page resumes after the sort
+    values of the previous page's last hit, so pages neither repeat nor skip hits.
+    Every match is still scored and sorted on every page, since score is computed.
+    """
+    pipeline = [{"$match": match}, {"$addFields": {"score": rank}}]
+    if after is not None:
+        pipeline.append({"$match": after_filter(sort, after)})
+    pipeline += [
+        {"$sort": dict(sort)},
+        {"$limit": limit},
+        {"$project": dict({field: 1 for field in fields}, score=1)},
+    ]
+    try:
+        hits = list(collection.aggregate(pipeline))
+    except Exception as e:
+        logging.error(f"Error searching {collection.name}: {e}")
+        raise RuntimeError(f"Failed to search {collection.name}: {e}")
+    cursor = tuple(hits[-1].get(field) for field, _ in sort) if len(hits) == limit else None
+    return hits, cursor
+
+
+def search_freelancers(
+    db,
+    skills: Optional[Iterable[str]] = None,
+    query: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    after: Optional[tuple] = None,
+    limit: int = 20,
+) -> Tuple[List[dict], Optional[tuple]]:
+    """
+    Finds freelancers by skills and/or free text, best matches first.
+
+    Skills are matched exactly through the multikey skills index and ranked by how
+    many of them a freelancer has. A query is matched against skills and services
+    through the text index and ranked by text score instead. Ties are broken by
+    averageRating, highest first.
+
+    Parameters:
+        db (Database): The MongoDB database object.
+        skills (list): Skills of which a freelancer must have at least one.
+        query (str): Words or "phrases" to match in skills and services.
+        min_rating (float): Minimum averageRating.
+        after (tuple): The cursor returned by the previous call, or None for the first page.
+        limit (int): Maximum number of hits to return.
+
+    Returns:
+        tuple: The hits (FREELANCER_FIELDS plus score), and the cursor of the next page (None on the last page).
+    """
+    skills = list(skills or [])
+    match = {}
+    if query:
+        match["$text"] = {"$search": query}
+    if skills:
+        match["skills"] = {"$in": skills}
+    if min_rating is not None:
+        match["averageRating"] = {"$gte": min_rating}
+    if not skills and not query:
+        raise ValueError("search_freelancers needs skills or a query.")
+
+    rank = {"$meta": "textScore"} if query else {"$size": {"$setIntersection": ["$skills", skills]}}
+    sort = [("score", -1), ("averageRating", -1), ("_id", 1)]
+    return _search(db[Freelancer.collection_name], match, rank, sort, FREELANCER_FIELDS, after, limit)
+
+
+def search_projects(
+    db,
+    query: str,
+    budget_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+    after: Optional[tuple] = None,
+    limit: int = 20,
+) -> Tuple[List[dict], Optional[tuple]]:
+    """
+    Finds projects whose title or description match query, best matches first.
+
+    Title matches weigh ten times as much as description matches.
+
+    Parameters:
+        db (Database): The MongoDB database object.
+        query (str): Words or "phrases" to search for; prefix a word with - to exclude it.
+        budget_range (tuple): (minimum, maximum) budget, either of which may be None.
+        after (tuple): The cursor returned by the previous call, or None for the first page.
+        limit (int): Maximum number of hits to return.
+
+    Returns:
+        tuple: The hits (PROJECT_FIELDS plus score), and the cursor of the next page (None on the last page).
+    """
+    match = {"$text": {"$search": query}}
+    if budget_range is not None:
+        low, high = budget_range
+        budget = {}
+        if low is not None:
+            budget["$gte"] = low
+        if high is not None:
+            budget["$lte"] = high
+        if budget:
+            match["budget"] = budget
+
+    sort = [("score", -1), ("_id", 1)]
+    return _search(db[Project.collection_name], match, {"$meta": "textScore"}, sort, PROJECT_FIELDS, after, limit)
@@ -2,7 +2,24 @@ import streamlit as st
 import pandas as pd
 import create_collections
 import delete_collections
+import analytics
+import indexes
+import search
+import export
+import re
+import os
+import tempfile
+import zipfile
+import bson
 from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo.errors import OperationFailure
+from datetime import datetime, timedelta
+from classes.rollups import FreelancerStats, DailyPayments
+from classes.cache import query_cache
+
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
 
 
 # Function to show an expandable popup for database deletion
@@ -33,6 +50,49 @@ def show_create_database_section():
             
             
 
+# Function to display the Export expander, offering the exported files as a zip download
+def show_export_section(db, collections):
+    """
+    Exports a collection with export.export_collection and offers the files as a zip download.
+
+    The export itself streams in bounded memory, and the zip is written to a
+    temporary file; session state only keeps its path, so the download button
+    survives reruns. The file is deleted once downloaded or replaced by a new export.
+    """
+    with st.expander("📦 Export a collection"):
+        collection_name = st.selectbox("Collection:", collections, key="export_collection")
+        file_format = st.radio("Format:", sorted(export.FORMATS), horizontal=True, key="export_format")
+        child_tables = st.checkbox("Write embedded arrays as child tables", value=True, key="export_child_tables")
+        if st.button("Prepare export"):
+            _discard_export()
+            progress = st.empty()
+            with tempfile.TemporaryDirectory() as output_dir:
+                stats = export.export_collection(
+                    db, collection_name, output_dir, file_format, child_tables=child_tables,
+                    on_batch=lambda done: progress.write(f"{done:,} documents exported..."),
+                )
+                with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as archive_file:
+                    with zipfile.ZipFile(archive_file, "w", zipfile.ZIP_DEFLATED) as archive:
+                        for file_name in sorted(os.listdir(output_dir)):
+                            archive.write(os.path.join(output_dir, file_name), file_name)
+            st.session_state["export_result"] = (f"{collection_name}_{file_format}.zip", archive_file.name, stats)
+
+        result = st.session_state.get("export_result")
+        if result and os.path.exists(result[1]):
+            file_name, path, stats = result
+            st.caption(f"Exported in {stats['seconds']:.1f}s ({stats['docs_per_second']:,.0f} documents/s).")
+            with open(path, "rb") as data:
+                st.download_button("Download " + file_name, data, file_name=file_name, mime="application/zip",
+                                   on_click=_discard_export)
+
+
+def _discard_export():
+    """Deletes the prepared export zip, if any, and forgets it."""
+    result = st.session_state.pop("export_result", None)
+    if result and os.path.exists(result[1]):
+        os.remove(result[1])
+
+
 def clean_mongo_record(record):
     """
     Recursively convert MongoDB-specific types (like ObjectId) to JSON-serializable types,
@@ -75,10 +135,537 @@ def clean_mongo_record(record):
         return record
 
 
+def _stringify_nested(value):
+    """Converts ObjectIds inside an embedded list or document to strings."""
+    if isinstance(value, dict):
+        return {key: _stringify_nested(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_stringify_nested(item) for item in value]
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+def documents_to_dataframe(raw_documents):
+    """
+    Converts a batch of raw BSON documents into a display-ready DataFrame.
+
+    The batch is decoded with a single decode_all call and flattened with
+    pd.json_normalize; ObjectId and datetime columns are then converted once
+    per column instead of once per value.
+
+    Args:
+        raw_documents (list): RawBSONDocument instances, e.g. from a cursor using RAW_CODEC_OPTIONS.
+
+    Returns:
+        pd.DataFrame: One row per document, nested documents flattened into dotted columns.
+    """
+    documents = bson.decode_all(b"".join(document.raw for document in raw_documents))
+    return records_to_dataframe(documents)
+
+
+def records_to_dataframe(documents):
+    """Converts already decoded documents into a display-ready DataFrame, like documents_to_dataframe."""
+    df = pd.json_normalize(documents)
+    for column in df.columns:
+        values = df[column].dropna()
+        if values.empty:
+            continue
+        first = values.iloc[0]
+        if isinstance(first, ObjectId):
+            df[column] = df[column].astype("string")
+        elif isinstance(first, datetime):
+            # A column mixing datetimes with e.g. strings would fail to parse; show it as text
+            if all(isinstance(value, datetime) for value in values):
+                df[column] = pd.to_datetime(df[column], utc=True)
+            else:
+                df[column] = df[column].astype("string")
+        elif isinstance(first, (list, dict)):
+            # Embedded arrays are kept whole; only their ObjectIds need converting
+            df[column] = df[column].map(_stringify_nested, na_action="ignore")
+    return df
+
+
+PAGE_SIZES = [25, 50, 100, 250, 500]
+
+
+# Sort of the viewer when none is chosen; every sort ends with _id so that it is total
+DEFAULT_SORT = [("_id", 1)]
+
+
+def page_query(after=None, filter=None, sort=None):
+    """
+    Builds the query of a page: filter, and the documents sorting after the previous page.
+
+    Args:
+        after (tuple): The sort values of the previous page's last document (see page_cursor), or None for the first page.
+        filter (dict): Query the documents must match; all documents when empty.
+        sort (list): (field, direction) pairs ending with _id; DEFAULT_SORT when omitted.
+    """
+    conditions = [filter] if filter else []
+    if after is not None:
+        conditions.append(search.after_filter(sort or DEFAULT_SORT, after))
+    return {"$and": conditions} if len(conditions) > 1 else (conditions[0] if conditions else {})
+
+
+def page_cursor(document, sort=None):
+    """Returns the sort values of document, which the next page starts after."""
+    values = []
+    for field, _ in sort or DEFAULT_SORT:
+        value = document
+        for part in field.split("."):
+            value = value.get(part) if hasattr(value, "get") else None
+        values.append(value)
+    return tuple(values)
+
+
+def _projection(paths):
+    """Builds an inclusion projection of paths, leaving out those inside another one (MongoDB rejects the collision)."""
+    paths = set(paths)
+    return {
+        path: 1 for path in sorted(paths)
+        if not any(path.startswith(f"{parent}.") for parent in paths)
+    }
+
+
+def fetch_page(collection, after=None, page_size=50, fields=None, filter=None, sort=None):
+    """
+    Fetches one page of documents using keyset pagination.
+
+    Args:
+        collection: The MongoDB collection.
+        after (tuple): The page_cursor of the previous page's last document, or None for the first page.
+        page_size (int): Maximum number of documents to return.
+        fields (list): Fields to project; all fields are returned when empty.
+        filter (dict): Query the documents must match; all documents when empty.
+        sort (list): (field, direction) pairs ending with _id; DEFAULT_SORT when omitted.
+
+    Returns:
+        list: The documents of the page as RawBSONDocuments, in sort order.
+    """
+    sort = sort or DEFAULT_SORT
+    # The sort fields are always fetched, since the next page starts after their values
+    projection = _projection(list(fields) + [field for field, _ in sort]) if fields else None
+    raw_collection = collection.with_options(codec_options=RAW_CODEC_OPTIONS)
+    # One batch of exactly the page, instead of the default 101-document first batch
+    cursor = raw_collection.find(page_query(after, filter, sort), projection, batch_size=page_size)
+    return list(cursor.sort(sort).limit(page_size))
+
+
+def _cached(key, compute):
+    """Returns the query_cache entry for key, computing and caching it on a miss."""
+    result = query_cache.get(key)
+    if result is None:
+        result = compute()
+        query_cache.put(key, result)
+    return result
+
+
+def load_collection_overview(collection):
+    """
+    Returns the approximate document count and the field names of a sample document.
+
+    Cached in query_cache like load_page.
+    """
+    def compute():
+        sample = collection.find_one() or {}
+        return collection.estimated_document_count(), [field for field in sample if field != "_id"]
+
+    return _cached((collection.full_name, "overview"), compute)
+
+
+def load_page(collection, after=None, page_size=50, fields=None, filter=None, sort=None):
+    """
+    Returns one page as a DataFrame, with the cursor of the next page, the row count and the query plan.
+
+    Pages are cached in query_cache, keyed by collection, filter, sort, projection
+    and page, for its TTL or until the modules that rewrite collections clear it,
+    so reruns triggered by unrelated widgets do not query MongoDB again.
+
+    Returns:
+        tuple: (DataFrame, page_cursor of the last row or None, number of rows,
+        indexes.explain_query result or None if the server refused to explain)
+    """
+    def compute():
+        records = fetch_page(collection, after, page_size, fields, filter, sort)
+        try:
+            plan = indexes.explain_query(collection, page_query(after, filter, sort), sort or DEFAULT_SORT, page_size)
+        except OperationFailure:
+            plan = None
+        if not records:
+            return pd.DataFrame(), None, 0, plan
+        # Convert the raw page to a DataFrame column by column
+        return documents_to_dataframe(records), page_cursor(records[-1], sort), len(records), plan
+
+    # Encoded, since the filter and the cursor values (e.g. datetimes or ObjectIds) need not be hashable
+    query_key = bson.encode({"filter": filter or {}, "sort": sort or DEFAULT_SORT,
+                             "after": list(after) if after is not None else None})
+    key = (collection.full_name, "page", query_key, tuple(fields or ()), page_size)
+    return _cached(key, compute)
+
+
+# Strings with at most this many distinct sampled values are filtered with a multiselect
+ENUM_LIMIT = 12
+NUMBER_OPERATORS = {"=": "$eq", "≠": "$ne", ">": "$gt", "≥": "$gte", "<": "$lt", "≤": "$lte"}
+
+
+def _kind(value):
+    """The filter widget type of a sampled value, or None if it cannot be filtered."""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, datetime):
+        return "datetime"
+    if isinstance(value, ObjectId):
+        return "objectid"
+    return None
+
+
+def _filterable_values(document, prefix="", in_array=False):
+    """
+    Yields (path, value, in_array) for the scalars of a document, one embedded document deep.
+
+    Arrays are represented by their first item, with in_array set for them and for
+    the fields of documents inside them.
+    """
+    for key, value in document.items():
+        is_array = in_array or isinstance(value, list)
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if isinstance(value, dict):
+            if not prefix:
+                yield from _filterable_values(value, f"{key}.", is_array)
+        elif value is not None:
+            yield f"{prefix}{key}", value, is_array
+
+
+def infer_schema(collection, sample_size=200):
+    """
+    Infers the filterable fields of a collection from a random sample of its documents.
+
+    Returns:
+        dict: Field path -> (kind, choices, sortable). kind is "number", "string",
+        "bool", "datetime" or "objectid"; choices lists the distinct values of string
+        fields with at most ENUM_LIMIT of them, and is None otherwise; sortable is
+        False for paths that hold or pass through an array in any sampled document,
+        since an array has no single value to resume the next page after.
+    """
+    def compute():
+        kinds, strings, arrays = {}, {}, set()
+        for document in collection.aggregate([{"$sample": {"size": sample_size}}]):
+            for path, value, in_array in _filterable_values(document):
+                kind = kinds.setdefault(path, _kind(value))
+                if in_array:
+                    arrays.add(path)
+                if kind == "string" and isinstance(value, str):
+                    strings.setdefault(path, set()).add(value)
+        return {
+            path: (
+                kind,
+                sorted(strings[path]) if kind == "string" and len(strings.get(path, ())) <= ENUM_LIMIT else None,
+                path not in arrays,
+            )
+            for path, kind in kinds.items() if kind is not None
+        }
+
+    return _cached((collection.full_name, "schema"), compute)
+
+
+def load_indexed_fields(collection):
+    return _cached((collection.full_name, "indexed"), lambda: indexes.indexed_fields(collection.index_information()))
+
+
+def _filter_widget(path, kind, choices, key):
+    """Displays the widgets filtering one field; returns its query condition, or None when unset."""
+    if kind == "bool":
+        value = st.selectbox(path, ["any", "true", "false"], key=key)
+        return None if value == "any" else value == "true"
+    if kind == "string" and choices is not None:
+        selected = st.multiselect(path, choices, key=key)
+        return {"$in": selected} if selected else None
+    if kind == "string":
+        operator_col, value_col = st.columns([1, 3])
+        operator = operator_col.selectbox(path, ["equals", "starts with", "contains"], key=f"{key}_op")
+        value = value_col.text_input("Value", key=key, label_visibility="hidden")
+        if not value:
+            return None
+        if operator == "equals":
+            return value
+        # Only an anchored, case-sensitive prefix can use an index
+        if operator == "starts with":
+            return {"$regex": f"^{re.escape(value)}"}
+        return {"$regex": re.escape(value), "$options": "i"}
+    if kind == "number":
+        operator_col, value_col = st.columns([1, 3])
+        operator = operator_col.selectbox(path, list(NUMBER_OPERATORS), key=f"{key}_op")
+        value = value_col.number_input("Value", value=None, key=key, label_visibility="hidden")
+        return None if value is None else {NUMBER_OPERATORS[operator]: value}
+    if kind == "datetime":
+        days = st.date_input(path, value=[], key=key)
+        if len(days) != 2:
+            return None
+        start, end = days
+        return {"$gte": datetime.combine(start, datetime.min.time()),
+                "$lt": datetime.combine(end + timedelta(days=1), datetime.min.time())}
+    if kind == "objectid":
+        value = st.text_input(path, key=key).strip()
+        if value and not ObjectId.is_valid(value):
+            st.warning(f"'{value}' is not a valid ObjectId.")
+            return None
+        return ObjectId(value) if value else None
+    return None
+
+
+def show_filter_panel(collection):
+    """
+    Displays typed filter widgets and a sort selector for the fields of a schema sample.
+
+    Indexed fields are listed first and labelled, since filtering or sorting on
+    them avoids a collection scan.
+
+    Returns:
+        tuple: The MongoDB query and the sort ((field, direction) pairs ending with _id).
+    """
+    schema = infer_schema(collection)
+    indexed = load_indexed_fields(collection)
+    paths = sorted(schema, key=lambda path: (path not in indexed, path))
+
+    def label(path):
+        return f"{path} (indexed)" if path in indexed else path
+
+    key = f"{collection.name}_filter"
+    query = {}
+    with st.expander("Filter and sort"):
+        for path in st.multiselect("Filter on:", paths, format_func=label, key=f"{key}_fields"):
+            kind, choices, _ = schema[path]
+            condition = _filter_widget(path, kind, choices, f"{key}_{path}")
+            if condition is not None:
+                query[path] = condition
+        sort_col, direction_col = st.columns(2)
+        # Only single-valued fields can be sorted on; see infer_schema
+        sortable = [path for path in paths if path != "_id" and schema[path][2]]
+        sort_field = sort_col.selectbox("Sort by:", ["_id"] + sortable, format_func=label, key=f"{key}_sort")
+        direction = direction_col.radio("Order:", [1, -1], format_func=lambda d: "Ascending" if d == 1 else "Descending",
+                                        horizontal=True, key=f"{key}_direction")
+    sort = [(sort_field, direction)] if sort_field == "_id" else [(sort_field, direction), ("_id", direction)]
+    return query, sort
+
+
+def show_query_plan(plan):
+    """Displays the winning plan of the page query and its server execution time."""
+    if plan is None:
+        st.caption("The server did not return a query plan.")
+        return
+    scan = "index scan" if indexes.INDEX_STAGES.intersection(plan["stages"]) else "COLLECTION SCAN"
+    used = f" on {', '.join(plan['indexes'])}" if plan["indexes"] else ""
+    st.caption(
+        f"Plan: {' <- '.join(plan['stages'])} ({scan}{used}). "
+        f"Server time {plan['executionTimeMillis']} ms; examined {plan['totalKeysExamined']} keys "
+        f"and {plan['totalDocsExamined']} documents to return {plan['nReturned']}."
+    )
+
+
+# OperationFailure code of $changeStream on a standalone mongod; change streams need a replica set
+CHANGE_STREAM_UNSUPPORTED = 40573
+LIVE_REFRESH_SECONDS = 2
+# Upper bound on the change events applied per refresh; the rest wait for the next one
+MAX_CHANGES_PER_REFRESH = 1000
+
+
+def _watermark_field(collection_name):
+    """The document key of the collection's last-modified timestamp, or None if its entities have none."""
+    for entity_class in indexes.ENTITY_CLASSES:
+        touch_field = getattr(entity_class, "touch_field", None)
+        if entity_class.collection_name == collection_name and touch_field:
+            keys = {field.attribute: field.key for field in entity_class.fields}
+            return keys.get(touch_field, touch_field)
+    return None
+
+
+class LiveView:
+    """
+    Keeps a DataFrame of a collection's newest documents current by applying only what changed.
+
+    The view holds at most max_rows documents, newest _id first. Changes are read from
+    a change stream when the server supports one. On a standalone mongod the view
+    polls instead: inserts by _id above the highest _id seen, updates of its rows by
+    watermark_field above the newest value seen (every row is re-read when there is
+    no watermark field), and deletes by checking which of its _ids still exist.
+    Either way a refresh costs in proportion to the changes and max_rows, never to
+    the size of the collection.
+    """
+
+    def __init__(self, collection, fields=None, max_rows=50, watermark_field=None):
+        self.collection = collection
+        self.fields = list(fields) if fields else None
+        self.max_rows = max_rows
+        self.watermark_field = watermark_field
+        self.mode = None
+        self.dataframe = pd.DataFrame()
+        self._stream = None
+        self._ids = {}
+        self._last_id = None
+        self._watermark = None
+        self._open()
+
+    def _open(self):
+        """Starts following changes, then loads the initial rows so that no change falls in between."""
+        try:
+            self._stream = self.collection.watch(full_document="updateLookup", max_await_time_ms=50)
+            self.mode = "change stream"
+        except OperationFailure as e:
+            if e.code != CHANGE_STREAM_UNSUPPORTED:
+                raise
+            self._stream = None
+            self.mode = "polling"
+        documents = list(self.collection.find({}, self._projection()).sort("_id", -1).limit(self.max_rows))
+        self.dataframe = pd.DataFrame()
+        self._ids = {}
+        self._apply({document["_id"]: document for document in documents}, set())
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _projection(self):
+        if not self.fields:
+            return None
+        return dict.fromkeys(self.fields + [self.watermark_field] if self.watermark_field else self.fields, 1)
+
+    def _project(self, document):
+        if not self.fields:
+            return document
+        return {key: value for key, value in document.items() if key == "_id" or key in self.fields}
+
+    def _read_stream(self):
+        """Collects the pending change events as the latest version of each changed document."""
+        upserts, deleted = {}, set()
+        for _ in range(MAX_CHANGES_PER_REFRESH):
+            change = self._stream.try_next()
+            if change is None:
+                break
+            operation = change["operationType"]
+            if operation in ("drop", "dropDatabase", "rename", "invalidate"):
+                # The stream cannot continue past these; start over
+                self.close()
+                self._open()
+                return {}, set()
+            _id = change.get("documentKey", {}).get("_id")
+            document = change.get("fullDocument")
+            if operation in ("insert", "update", "replace") and document is not None:
+                upserts[_id] = document
+                deleted.discard(_id)
+            elif operation in ("insert", "update", "replace", "delete"):
+                # An update whose document was deleted before the lookup counts as a delete
+                deleted.add(_id)
+                upserts.pop(_id, None)
+        return upserts, deleted
+
+    def _poll(self):
+        """Finds new, updated and deleted documents by _id and watermark queries."""
+        ids = list(self._ids.values())
+        clauses = [{"_id": {"$gt": self._last_id}} if self._last_id is not None else {}]
+        if ids:
+            changed = {"_id": {"$in": ids}}
+            if self.watermark_field and self._watermark is not None:
+                changed[self.watermark_field] = {"$gt": self._watermark}
+            clauses.append(changed)
+        cursor = self.collection.find({"$or": clauses}, self._projection()).sort("_id", -1)
+        upserts = {document["_id"]: document for document in cursor.limit(self.max_rows + len(ids))}
+        existing = {document["_id"] for document in self.collection.find({"_id": {"$in": ids}}, {"_id": 1})}
+        return upserts, set(ids) - existing
+
+    def _apply(self, upserts, deleted):
+        """
+        Applies changed and deleted documents to the DataFrame; returns the counts of each kind.
+
+        The documents are projected to the selected fields only here, after their
+        watermark has been read, so the watermark field is not shown unless selected.
+        """
+        frame = self.dataframe
+        deleted_keys = [str(_id) for _id in deleted if str(_id) in self._ids]
+        counts = {"inserted": 0, "updated": 0, "deleted": len(deleted_keys)}
+        if deleted_keys:
+            frame = frame.drop(index=deleted_keys)
+        if upserts:
+            changed = records_to_dataframe([self._project(document) for document in upserts.values()])
+            changed = changed.set_index("_id")
+            counts["updated"] = int(changed.index.isin(frame.index).sum())
+            counts["inserted"] = len(changed) - counts["updated"]
+            frame = pd.concat([changed, frame[~frame.index.isin(changed.index)]])
+        self.dataframe = frame.sort_index(ascending=False).head(self.max_rows)
+
+        for key in deleted_keys:
+            del self._ids[key]
+        for _id, document in upserts.items():
+            self._ids[str(_id)] = _id
+            if self._last_id is None or (type(_id) is type(self._last_id) and _id > self._last_id):
+                self._last_id = _id
+            watermark = document.get(self.watermark_field) if self.watermark_field else None
+            if isinstance(watermark, datetime) and (self._watermark is None or watermark > self._watermark):
+                self._watermark = watermark
+        self._ids = {key: self._ids[key] for key in self.dataframe.index if key in self._ids}
+        return counts
+
+    def refresh(self) -> dict:
+        """Applies the changes since the last refresh; returns the number of rows inserted, updated and deleted."""
+        upserts, deleted = self._read_stream() if self._stream is not None else self._poll()
+        return self._apply(upserts, deleted)
+
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def _live_table(state_key):
+    view = st.session_state[state_key]
+    counts = view.refresh()
+    st.caption(
+        f"Live via {view.mode}, newest {view.max_rows} documents, refreshed every {LIVE_REFRESH_SECONDS}s. "
+        f"Last refresh: {counts['inserted']} inserted, {counts['updated']} updated, {counts['deleted']} deleted."
+    )
+    st.dataframe(view.dataframe)
+
+
+def show_live_view(collection, fields, max_rows):
+    """
+    Displays the newest max_rows documents of a collection and keeps them current.
+
+    The LiveView lives in session state, so reruns and the periodic refresh only
+    apply changes to its DataFrame instead of querying the collection again.
+    """
+    state_key = f"{collection.name}_live"
+    view = st.session_state.get(state_key)
+    if view is None or view.fields != (list(fields) or None) or view.max_rows != max_rows:
+        if view is not None:
+            view.close()
+        st.session_state[state_key] = LiveView(collection, fields, max_rows, _watermark_field(collection.name))
+    _live_table(state_key)
+
+
+def _stop_live_view(collection_name):
+    view = st.session_state.pop(f"{collection_name}_live", None)
+    if view is not None:
+        view.close()
+
+
+def _next_page(state_key, cursor):
+    st.session_state[state_key].append(cursor)
+
+
+def _previous_page(state_key):
+    if len(st.session_state[state_key]) > 1:
+        st.session_state[state_key].pop()
+
+
 def display_collection_selector(db, collections):
     """
-    Displays a dropdown for collection selection and shows the data in a table.
-    
+    Displays a dropdown for collection selection and shows the data one page at a time.
+
+    Only the current page is fetched from MongoDB, restricted to the selected columns,
+    and pages are served from query_cache until it expires or is invalidated.
+
     Args:
         db: The MongoDB database object.
         collections (list): List of collection names.
@@ -89,14 +676,117 @@ def display_collection_selector(db, collections):
 
     # Access the selected collection
     collection = db[selected_collection]
-    data = collection.find()
-    
-    # Clean and convert the MongoDB data
-    data_list = [clean_mongo_record(record) for record in data]
-
-    if data_list:
-        # Convert cleaned data to a DataFrame
-        df = pd.DataFrame(data_list)
+    document_count, available_fields = load_collection_overview(collection)
+    count_col, reload_col = st.columns([3, 1])
+    count_col.write(f"Approximately {document_count} documents in this collection.")
+    reload_col.button("Reload", on_click=query_cache.invalidate_collection, args=(collection.full_name,),
+                      help="Discard cached pages of this collection.")
+
+    fields = st.multiselect(
+        "Columns to show (all when empty):", available_fields, key=f"{selected_collection}_fields"
+    )
+    page_size = st.selectbox("Rows per page:", PAGE_SIZES, index=1, key="page_size")
+
+    if st.toggle("Live mode", key=f"{selected_collection}_live_mode",
+                 help="Show the newest documents and apply changes as they happen."):
+        show_live_view(collection, fields, page_size)
+        return
+    _stop_live_view(selected_collection)
+
+    query, sort = show_filter_panel(collection)
+
+    # Each entry is the cursor of the previous page's last row, so the stack doubles as page history
+    state_key = f"{selected_collection}_page_starts"
+    page_starts = st.session_state.setdefault(state_key, [None])
+    # The history only holds for one query and sort; start over when they change
+    query_key = bson.encode({"filter": query, "sort": sort})
+    if st.session_state.get(f"{state_key}_query") != query_key:
+        st.session_state[f"{state_key}_query"] = query_key
+        page_starts[:] = [None]
+    df, next_cursor, row_count, plan = load_page(collection, page_starts[-1], page_size, fields, query, sort)
+
+    if row_count:
         st.dataframe(df)
     else:
-        st.write("No data found in the selected collection.")
\ No newline at end of file
+        st.write("No data found in the selected collection.")
+    show_query_plan(plan)
+
+    prev_col, page_col, next_col = st.columns(3)
+    with prev_col:
+        st.button("Previous page", on_click=_previous_page, args=(state_key,),
+                  disabled=len(page_starts) == 1)
+    with page_col:
+        st.write(f"Page {len(page_starts)}")
+    with next_col:
+        st.button("Next page", on_click=_next_page, args=(state_key, next_cursor),
+                  disabled=row_count < page_size)
+
+
+def _report_dataframe(rows, index_name):
+    """Converts aggregated report rows to a DataFrame indexed by their _id."""
+    df = records_to_dataframe(rows)
+    if df.empty:
+        return df
+    return df.rename(columns={"_id": index_name}).set_index(index_name)
+
+
+def show_analytics_dashboard(db):
+    """
+    Displays the analytics reports.
+
+    Every figure is read from a rollup collection or computed by an aggregation
+    pipeline in MongoDB, so only aggregated rows are transferred; pipeline results
+    are cached for analytics.REPORT_TTL seconds.
+
+    Args:
+        db: The MongoDB database object.
+    """
+    st.write("### Analytics")
+    st.caption(f"Reports are refreshed at most every {analytics.REPORT_TTL} seconds.")
+    if st.button("Refresh reports"):
+        analytics.invalidate()
+
+    st.write("#### Payments")
+    summary = analytics.payment_status_summary(db)
+    overall = summary["overall"]
+    count_col, amount_col, rate_col = st.columns(3)
+    count_col.metric("Payments", f"{overall['count']:,}")
+    amount_col.metric("Total amount", f"{overall['amount']:,.2f}")
+    rate_col.metric("Success rate", f"{overall['successRate']:.1%}")
+    by_status = _report_dataframe(summary["byStatus"], "paymentStatus")
+    if not by_status.empty:
+        st.bar_chart(by_status["count"])
+
+    st.write("#### Payments over the last 30 days")
+    today = datetime.utcnow()
+    daily = _report_dataframe(
+        DailyPayments.between(db[DailyPayments.collection_name], today - timedelta(days=30), today), "day"
+    )
+    if daily.empty:
+        st.write("No payments in the last 30 days.")
+    else:
+        st.line_chart(daily[["amount", "revenue"]])
+
+    st.write("#### Top freelancers by revenue")
+    revenue = _report_dataframe(FreelancerStats.top_by_revenue(db[FreelancerStats.collection_name]), "freelancerId")
+    if revenue.empty:
+        st.write("No completed payments yet.")
+    else:
+        st.dataframe(revenue)
+
+    st.write("#### Budget vs winning bid")
+    bids = analytics.budget_vs_winning_bid(db)
+    if bids["overall"] is None:
+        st.write("No project has a bid from its hired freelancer yet.")
+    else:
+        budget_col, bid_col = st.columns(2)
+        budget_col.metric("Average budget", f"{bids['overall']['averageBudget']:,.2f}")
+        bid_col.metric("Average winning bid", f"{bids['overall']['averageWinningBid']:,.2f}")
+        st.dataframe(_report_dataframe(bids["byBudget"], "budgetFrom"))
+
+    st.write("#### Freelancer ratings")
+    ratings = _report_dataframe(analytics.rating_distribution(db), "rating")
+    if ratings.empty:
+        st.write("No reviews yet.")
+    else:
+        st.bar_chart(ratings["count"])